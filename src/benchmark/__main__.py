@@ -11,7 +11,10 @@ import sys
 
 
 from scheduler import Scheduler
+from result_cache import ResultCache
 from output import Output
+from cost_model import CostModel
+from cpu_topology import CpuTopology
 
 def _check_int_positive(value):
     try:
@@ -37,6 +40,7 @@ def _check_str_path(value):
     return value
 
 def _arguments():
+    # pylint: disable=too-many-statements
     parser = argparse.ArgumentParser(description='Benchmark GAMS.')
     parser.add_argument('--testset',
                         type=str,
@@ -46,7 +50,9 @@ def _arguments():
     parser.add_argument('--modelpath',
                         type=str,
                         default='',
-                        help='Path to models (.gms, .py or .jl) if testset=other')
+                        help='Path to models (.gms, .py or .jl) if testset=other. Model '
+                        'files are shared with the jobs (hardlink, symlink) only if they are '
+                        'read-only, else they are copied')
     parser.add_argument('--result',
                         type=str,
                         default='latest',
@@ -71,6 +77,18 @@ def _arguments():
                         type=_check_int_nonnegative,
                         default='1',
                         help='Threads used to solve <n> models in parallel (default: 1)')
+    parser.add_argument('--memory_budget',
+                        type=_check_int_positive,
+                        default=None,
+                        help='Memory (MB) for jobs running in parallel. Jobs are only started '
+                             'while their estimated total peak memory fits (default: unlimited)')
+    parser.add_argument('--affinity',
+                        type=str,
+                        default='none',
+                        choices=['none', 'core', 'cpu'],
+                        help='Pin each job to a dedicated physical core incl. its SMT siblings '
+                             '(core) or to one hardware thread of a dedicated core (cpu) '
+                             '(default: none)')
     parser.add_argument('--max_jobs',
                         type=_check_int_positive,
                         default=sys.maxsize,
@@ -78,12 +96,91 @@ def _arguments():
     parser.add_argument('--max_total_time',
                         type=_check_int_positive,
                         default=sys.maxsize,
-                        help='Maximum time of benchmark until no further jobs are started')
+                        help='Maximum time of benchmark. Jobs are only started if their predicted '
+                             'time (history or max_time) fits into the remaining time')
+    parser.add_argument('--order',
+                        type=str,
+                        default='name',
+                        choices=['name', 'cost'],
+                        help='Order in which jobs are started: by model name or by estimated '
+                             'cost, longest job first (default: name)')
+    parser.add_argument('--interleave',
+                        action='store_true',
+                        help='Run all configurations of a model one after another instead of '
+                             'one configuration after another')
+    parser.add_argument('--repeat',
+                        type=_check_int_positive,
+                        default='1',
+                        help='Run each job <n> times, in rounds of one repeat of each job, '
+                             'and report median, min and interquartile range of times '
+                             '(default: 1)')
+    parser.add_argument('--seed',
+                        type=int,
+                        default=None,
+                        help='Seed of the random order of the jobs in a round of repeats '
+                             '(default: random)')
+    parser.add_argument('--history',
+                        type=str,
+                        default='',
+                        help='Result directories of previous runs used to estimate job costs, '
+                             'format: dir1,dir2,...')
     parser.add_argument('--interface',
                         type=str,
                         default='direct',
                         choices=['direct', 'pyomo', 'jump'],
                         help='Call GAMS through interface (default: direct)')
+    parser.add_argument('--workers',
+                        action='store_true',
+                        help='Run jobs in long-lived interpreter processes that load the '
+                             'interface only once (jump, pyomo)')
+    parser.add_argument('--sysimage',
+                        action='store_true',
+                        help='Run julia with a cached system image that has JuMP and GAMS.jl '
+                             'compiled in, built on first use (jump)')
+    parser.add_argument('--cache',
+                        type=str,
+                        default='',
+                        help='Directory of a result cache shared by result directories, jobs '
+                             'with cached results are not run (default: no cache)')
+    parser.add_argument('--cache_size',
+                        type=_check_int_positive,
+                        default=None,
+                        help='Max size (MB) of the result cache, least recently used results '
+                             'are evicted (default: unlimited)')
+    parser.add_argument('--cache_age',
+                        type=_check_int_positive,
+                        default=None,
+                        help='Days after which unused results are evicted from the cache '
+                             '(default: unlimited)')
+    parser.add_argument('--cache_bypass',
+                        action='store_true',
+                        help='Run all jobs and replace their results in the cache')
+    parser.add_argument('--scratch',
+                        type=str,
+                        default='',
+                        help='Run jobs in a scratch directory, e.g. a RAM disk like /dev/shm, '
+                             'and copy trace file, stdout and stderr of finished jobs into '
+                             'the result directory (default: run in result directory)')
+    parser.add_argument('--scratch_keep',
+                        type=str,
+                        default='',
+                        help='Additional files of a job run in a scratch directory that are '
+                             'kept, format: pattern1,pattern2,... e.g. *.lst')
+    parser.add_argument('--pack',
+                        action='store_true',
+                        help='Store the files of finished jobs compressed in one file per '
+                             'configuration (pack.db) instead of one directory per job')
+    parser.add_argument('--prefetch',
+                        type=_check_int_positive,
+                        default=None,
+                        help='Read the model files of the next <k> queued jobs into the page '
+                             'cache and create their working directories while jobs are '
+                             'running (default: off)')
+    parser.add_argument('--max_output',
+                        type=_check_int_positive,
+                        default=None,
+                        help='Max size (MB) of stdout / stderr files of a job, the beginning '
+                             'and end of larger output are kept (default: unlimited)')
     parser.add_argument('--output',
                         type=str,
                         default='jobs|name|config|model|status|objective|time',
@@ -94,12 +191,12 @@ def _arguments():
     # check arguments
     if args.testset == 'other':
         args.modelpath = _check_str_path(args.modelpath)
-    if os.path.exists(args.result):
-        print("Result directory '{:s}' already exists. Continue? [y]/n".format(args.result))
-        inp = input()
-        if inp not in ('y', ''):
-            sys.exit()
-
+    if len(args.scratch) > 0:
+        args.scratch = _check_str_path(args.scratch)
+    if len(args.history) == 0:
+        args.history = []
+    else:
+        args.history = [_check_str_path(path) for path in args.history.split(",")]
     if len(args.gamsopt) == 0:
         gamsopt = [[('id', 0)]]
     else:
@@ -107,46 +204,220 @@ def _arguments():
         for i, configuration in enumerate(args.gamsopt.split(";")):
             gamsopt.append([('id', i)])
             for option in configuration.split(","):
-                gamsopt[-1].append(tuple(option.split("=")))
+                option = tuple(option.split("="))
+                # number of cores of a job
+                if option[0] == 'weight' or option[0].lower() == 'threads':
+                    try:
+                        int(option[-1])
+                    except ValueError:
+                        parser.error("argument --gamsopt: %s must be an integer: '%s'" %
+                                     (option[0], option[-1]))
+                gamsopt[-1].append(option)
     args.gamsopt = gamsopt
 
+    if os.path.exists(args.result):
+        print("Result directory '{:s}' already exists. Continue? [y]/n".format(args.result))
+        inp = input()
+        if inp not in ('y', ''):
+            sys.exit()
+
     return args
 
 
-def _main():
+def _analyze_arguments(argv):
+    parser = argparse.ArgumentParser(prog='benchmark analyze',
+                                     description='Analyze GAMS benchmark results.')
+    parser.add_argument('results',
+                        type=_check_str_path,
+                        nargs='+',
+                        help='Result directories or trace files')
+    parser.add_argument('--solu',
+                        type=str,
+                        default=os.path.join('testsets', 'minlplib', 'minlplib.solu'),
+                        help='Solution file to check objectives '
+                             '(default: testsets/minlplib/minlplib.solu)')
+    parser.add_argument('--max_time',
+                        type=_check_int_positive,
+                        default='60',
+                        help='Time of unsolved instances (default: 60)')
+    parser.add_argument('--shift',
+                        type=float,
+                        default=10,
+                        help='Shift of shifted geometric mean of times (default: 10)')
+    return parser.parse_args(argv)
+
+
+def _analyze(argv):
     # pylint: disable=import-outside-toplevel
-    args = _arguments()
+    from analysis import Analysis
 
-    # start runner
+    args = _analyze_arguments(argv)
+    analysis = Analysis(args.max_time, args.shift)
+    analysis.load(args.results)
+    if os.path.exists(args.solu):
+        analysis.load_solu(args.solu)
+    print(analysis.summary())
+    print()
+    print(analysis.profile_table())
+
+
+def _compare_arguments(argv):
+    parser = argparse.ArgumentParser(prog='benchmark compare',
+                                     description='Compare GAMS benchmark results with a '
+                                                 'baseline and detect regressions.')
+    parser.add_argument('--baseline',
+                        type=_check_str_path,
+                        nargs='+',
+                        required=True,
+                        help='Result directories of baseline (several: repeated runs)')
+    parser.add_argument('--new',
+                        type=_check_str_path,
+                        nargs='+',
+                        required=True,
+                        help='Result directories of new results (several: repeated runs)')
+    parser.add_argument('--solu',
+                        type=str,
+                        default=os.path.join('testsets', 'minlplib', 'minlplib.solu'),
+                        help='Solution file to check objectives '
+                             '(default: testsets/minlplib/minlplib.solu)')
+    parser.add_argument('--max_time',
+                        type=_check_int_positive,
+                        default='60',
+                        help='Time of unsolved instances (default: 60)')
+    parser.add_argument('--threshold',
+                        type=float,
+                        default=0.2,
+                        help='Relative time difference of a slowdown (default: 0.2)')
+    parser.add_argument('--min_time',
+                        type=float,
+                        default=1.0,
+                        help='Absolute time difference of a slowdown (default: 1.0)')
+    return parser.parse_args(argv)
+
+
+def _compare(argv):
+    # pylint: disable=import-outside-toplevel
+    from comparison import Comparison
+
+    args = _compare_arguments(argv)
+    comparison = Comparison(args.max_time, args.threshold, args.min_time)
+    comparison.load(args.baseline, args.new,
+                    args.solu if os.path.exists(args.solu) else None)
+    report, regressions = comparison.report()
+    print(report)
+    return 1 if regressions else 0
+
+
+def _runner(args):
+    # pylint: disable=import-outside-toplevel
     if args.interface == 'direct':
         from runner_direct import RunnerDirect
         runner = RunnerDirect(args.gams)
     elif args.interface == 'pyomo':
         from runner_pyomo import RunnerPyomo
-        runner = RunnerPyomo()
+        runner = RunnerPyomo(args.workers)
     elif args.interface == 'jump':
         from runner_jump import RunnerJump
-        if args.threads == 1:
-            # runner = RunnerJump(args.gams, use_pyjulia=True)
-            runner = RunnerJump(args.gams, use_pyjulia=False)
-        else:
-            runner = RunnerJump(args.gams, use_pyjulia=False)
+        runner = RunnerJump(args.gams, args.workers)
+    return runner
+
+
+def _subcommand(argv):
+    # runs a subcommand (analyze, compare), returns False if there is none
+    if len(argv) > 0 and argv[0] == 'analyze':
+        _analyze(argv[1:])
+        return True
+    if len(argv) > 0 and argv[0] == 'compare':
+        sys.exit(_compare(argv[1:]))
+    return False
+
+
+def _order(scheduler, args):
+    # order in which jobs are started, repeated jobs in rounds, in random order if no
+    # order is chosen
+    if args.order == 'cost':
+        scheduler.sort()
+    if args.interleave:
+        scheduler.interleave()
+    if args.repeat > 1:
+        scheduler.shuffle(args.seed, args.order == 'cost' or args.interleave)
+
+
+def _storage(scheduler, args):
+    # directories jobs are run in, archive of their files, jobs prepared ahead
+    if len(args.scratch) > 0:
+        scheduler.use_scratch(args.scratch,
+                              [pattern for pattern in args.scratch_keep.split(",") if pattern])
+    if args.pack:
+        scheduler.use_packs()
+    if args.prefetch is not None:
+        scheduler.use_prefetch(args.prefetch)
+
+
+def _cache(args):
+    # shared result cache
+    if len(args.cache) == 0:
+        return None
+    return ResultCache(args.cache,
+                       None if args.cache_size is None else args.cache_size * 1024**2,
+                       None if args.cache_age is None else args.cache_age * 86400,
+                       args.cache_bypass)
+
+
+def _main():
+    if _subcommand(sys.argv[1:]):
+        return
+
+    args = _arguments()
+
+    # start runner
+    runner = _runner(args)
+    if args.max_output is not None:
+        runner.max_output = args.max_output * 1024**2
 
     # select model files
     if args.testset == 'minlplib':
         model_path = os.path.join('testsets', 'minlplib', runner.modelfile_ext)
         solu_file = os.path.join('testsets', 'minlplib', 'minlplib.solu')
+        instancedata_file = os.path.join('testsets', 'minlplib', 'instancedata.csv')
     elif args.testset == 'princetonlib':
         model_path = os.path.join('testsets', 'princetonlib', runner.modelfile_ext)
         solu_file = None
+        instancedata_file = None
     elif args.testset == 'other':
         model_path = args.modelpath
         solu_file = None
+        instancedata_file = None
+
+    # julia system image, compiled on models of the testset
+    if args.sysimage:
+        if args.interface != 'jump':
+            sys.exit("Option --sysimage requires interface jump")
+        runner.build_sysimage(model_path)
+
+    # estimate job costs
+    cost_model = CostModel()
+    if instancedata_file is not None:
+        cost_model.load_instancedata(instancedata_file)
+    for path in args.history:
+        cost_model.load_history(path)
+
+    # dedicated cores for jobs
+    topology = None
+    if args.affinity != 'none':
+        topology = CpuTopology(args.affinity)
+        if topology.n_cores() < args.threads:
+            sys.exit("Only %d physical cores available for %d threads" %
+                     (topology.n_cores(), args.threads))
 
     # run benchmark
-    scheduler = Scheduler(runner, args.result, args.gamsopt, Output(args.output))
-    scheduler.create(model_path, args.max_jobs, args.max_time, args.kill_time, solu_file)
-    scheduler.run(args.threads, args.max_total_time)
+    scheduler = Scheduler(runner, args.result, args.gamsopt, Output(args.output), cost_model,
+                          topology, _cache(args))
+    _storage(scheduler, args)
+    scheduler.create(model_path, args.max_jobs, args.max_time, args.kill_time, solu_file,
+                     args.repeat)
+    _order(scheduler, args)
+    scheduler.run(args.threads, args.max_total_time, args.memory_budget)
 
 
 if __name__ == '__main__':
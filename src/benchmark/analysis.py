@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+""" Analysis """
+
+import os
+import glob
+
+import numpy as np
+
+from trace_dict import TraceDict
+
+# trace entries loaded for the analysis
+ANALYSIS_ENTRIES = [
+    'Direction', 'ModelStatus', 'SolverStatus', 'ObjectiveValue', 'ObjectiveValueEstimate',
+    'SolverTime', 'ETInterface', 'OutOfMemory'
+]
+
+# model status of a feasible solution
+FEASIBLE_STATUS = [1, 2, 8, 15, 16, 17]
+
+# tolerance of the objective checks against the solution file (as Output)
+OBJECTIVE_TOLERANCE = 1e-5
+
+# ratios to the fastest configuration at which performance profiles are reported
+PROFILE_TAUS = [1, 2, 4, 8, 16, 32, 64]
+
+# status classes of results
+STATUS_MISSING = -1
+STATUS_OPTIMAL = 0
+STATUS_FEASIBLE = 1
+STATUS_INFEASIBLE = 2
+STATUS_LIMIT = 3
+STATUS_WRONG = 4
+STATUS_FAIL = 5
+STATUS_NAMES = ['optimal', 'feasible', 'infeasible', 'limit', 'wrong', 'fail']
+
+class Analysis:
+    """
+    Performance analysis of benchmark results: solved instances, shifted geometric
+    means of times, performance profiles and comparison with the virtual best
+    configuration. Results are stored as arrays of configurations x instances, built
+    from the columns of the trace databases of the configurations.
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, max_time=60, shift=10):
+        """
+        Arguments
+        ---------
+        max_time: float
+            Time of unsolved instances
+        shift: float
+            Shift of the shifted geometric mean of times
+        """
+        self.max_time = max_time
+        self.shift = shift
+        self.configurations = list()
+        self.instances = list()
+        self.data = dict()
+        self.present = None
+        self.solu = dict()
+
+
+    @staticmethod
+    def trace_files(paths):
+        """
+        Returns the trace files of result directories (one per configuration) or
+        trace files as list of (label, trace file)
+
+        Arguments
+        ---------
+        paths: list
+            Result directories or trace files
+        """
+        files = list()
+        for path in paths:
+            if os.path.isfile(path):
+                files.append((os.path.splitext(os.path.basename(path))[0], path))
+                continue
+            for trcfile in sorted(glob.glob(os.path.join(path, '*', 'trace.trc'))):
+                label = os.path.basename(os.path.dirname(trcfile))
+                if len(paths) > 1:
+                    label = os.path.basename(os.path.normpath(path)) + '/' + label
+                files.append((label, trcfile))
+        return files
+
+
+    def load(self, paths):
+        """
+        Loads benchmark results
+
+        Arguments
+        ---------
+        paths: list
+            Result directories or trace files
+        """
+        databases = list()
+        for label, trcfile in self.trace_files(paths):
+            traces = TraceDict()
+            traces.append_trc(trcfile, ANALYSIS_ENTRIES)
+            self.configurations.append(label)
+            databases.append(traces)
+
+        # instance names without extension (of the trace records in column order)
+        names = [[None if name is None else name.rpartition('.')[0] or name
+                  for name in traces.names()] for traces in databases]
+        self.instances = sorted(set(name for rows in names for name in rows
+                                    if name is not None))
+        index = {name: j for j, name in enumerate(self.instances)}
+        shape = (len(self.configurations), len(self.instances))
+        self.present = np.zeros(shape, dtype=bool)
+        for key in ANALYSIS_ENTRIES:
+            self.data[key] = np.full(shape, np.nan)
+        for i, traces in enumerate(databases):
+            rows = [row for row, name in enumerate(names[i]) if name is not None]
+            instances = [index[names[i][row]] for row in rows]
+            self.present[i, instances] = True
+            for key in ANALYSIS_ENTRIES:
+                self.data[key][i, instances] = self._column(traces, key)[rows]
+
+
+    @staticmethod
+    def _column(traces, key):
+        # values of a numerical trace entry as floats, NaN for NA
+        values, missing = traces.column(key)
+        dtype = np.float64 if values.typecode == 'd' else np.int64
+        values = np.frombuffer(values, dtype=dtype).astype(float)
+        values[np.frombuffer(missing, dtype=np.uint8) == 1] = np.nan
+        return values
+
+
+    def load_solu(self, solufile):
+        """
+        Loads the known optimal / best objective values of the instances
+
+        Arguments
+        ---------
+        solufile: str
+            Solution file
+        """
+        solu = TraceDict()
+        solu.load_solu(solufile)
+        rows = {name: row for row, name in enumerate(solu.names())}
+        instances = [j for j, name in enumerate(self.instances) if name in rows]
+        rows = [rows[self.instances[j]] for j in instances]
+        for key in ('ModelStatus', 'ObjectiveValue', 'ObjectiveValueEstimate'):
+            self.solu[key] = np.full(len(self.instances), np.nan)
+            self.solu[key][instances] = self._column(solu, key)[rows]
+
+
+    def wrong(self):
+        """
+        Returns whether results contradict the solution file (primal bound better than
+        best known dual bound, dual bound worse than best known primal bound or
+        feasibility status), as checked by Output
+        """
+        if len(self.solu) == 0:
+            return np.zeros(self.present.shape, dtype=bool)
+        solver_status = self.data['SolverStatus']
+        model_status = self.data['ModelStatus']
+        minimize = self.data['Direction'] != 1
+        objective = self.data['ObjectiveValue']
+        estimate = self.data['ObjectiveValueEstimate']
+        solu_status = self.solu['ModelStatus'][None, :]
+        solu_objective = self.solu['ObjectiveValue'][None, :]
+        solu_estimate = self.solu['ObjectiveValueEstimate'][None, :]
+
+        feasible = (solver_status == 1) & np.isin(model_status, FEASIBLE_STATUS)
+        with np.errstate(invalid='ignore'):
+            dual = np.where(minimize, estimate > solu_objective + OBJECTIVE_TOLERANCE,
+                            estimate < solu_objective - OBJECTIVE_TOLERANCE)
+            primal = np.where(minimize, objective < solu_estimate - OBJECTIVE_TOLERANCE,
+                              objective > solu_estimate + OBJECTIVE_TOLERANCE)
+        status = ((feasible & (solu_status == 4)) |
+                  ((solver_status == 1) & (model_status == 4) & (solu_status == 1)))
+        return self.present & ((feasible & (dual | primal)) | status)
+
+
+    def solved(self):
+        """
+        Returns whether instances were solved: normal completion without error status,
+        out of memory or contradiction to the solution file
+        """
+        model_status = self.data['ModelStatus']
+        failed = ((model_status >= 11) & (model_status <= 14)) | (self.data['OutOfMemory'] == 1)
+        return (self.present & (self.data['SolverStatus'] == 1) & ~failed & ~self.wrong())
+
+
+    def statuses(self):
+        """
+        Returns the status class of the results (STATUS_*)
+        """
+        solver_status = self.data['SolverStatus']
+        model_status = self.data['ModelStatus']
+        statuses = np.full(self.present.shape, STATUS_FAIL)
+        statuses[np.isin(solver_status, [2, 3])] = STATUS_LIMIT
+        normal = solver_status == 1
+        statuses[normal & np.isin(model_status, FEASIBLE_STATUS)] = STATUS_FEASIBLE
+        statuses[normal & np.isin(model_status, [1, 2, 15])] = STATUS_OPTIMAL
+        statuses[normal & np.isin(model_status, [4, 10, 19])] = STATUS_INFEASIBLE
+        statuses[((model_status >= 11) & (model_status <= 14)) |
+                 (self.data['OutOfMemory'] == 1)] = STATUS_FAIL
+        statuses[self.wrong()] = STATUS_WRONG
+        statuses[np.logical_not(self.present)] = STATUS_MISSING
+        return statuses
+
+
+    def times(self, key='SolverTime'):
+        """
+        Returns the times of the results, max_time for unsolved instances
+
+        Arguments
+        ---------
+        key: str
+            SolverTime or ETInterface (SolverTime if not available)
+        """
+        times = self.data[key]
+        if key != 'SolverTime':
+            times = np.where(np.isnan(times), self.data['SolverTime'], times)
+        times = np.where(np.isnan(times), self.max_time, times)
+        return np.where(self.solved(), np.clip(times, 0, None), self.max_time)
+
+
+    def shifted_geometric_mean(self, times, axis=-1):
+        """
+        Returns the shifted geometric mean of times
+
+        Arguments
+        ---------
+        times: np.ndarray
+            Times
+        axis: int
+            Axis of the mean
+        """
+        return np.exp(np.mean(np.log(times + self.shift), axis=axis)) - self.shift
+
+
+    @staticmethod
+    def profiles(times, solved, taus=None):
+        """
+        Returns the Dolan-More performance profiles of the configurations: the share of
+        instances solved within tau times the time of the fastest configuration
+
+        Arguments
+        ---------
+        times: np.ndarray
+            Times of configurations x instances
+        solved: np.ndarray
+            Solved configurations x instances
+        taus: list
+            Ratios to the fastest configuration
+        """
+        if taus is None:
+            taus = PROFILE_TAUS
+        times = np.where(solved, np.maximum(times, 1e-6), np.inf)
+        best = times.min(axis=0)
+        with np.errstate(invalid='ignore'):
+            ratios = np.where(np.isfinite(best), times / best, np.inf)
+        return (ratios[:, :, None] <= np.asarray(taus, dtype=float)[None, None, :]).mean(axis=1)
+
+
+    def summary(self):
+        """
+        Returns a table of the solved counts, shifted geometric means and virtual best
+        comparisons over the instances present for all configurations
+        """
+        # pylint: disable=too-many-locals
+        common = self.present.all(axis=0)
+        solved = self.solved()[:, common]
+        wrong = self.wrong()[:, common]
+        times = self.times('SolverTime')[:, common]
+        et_times = self.times('ETInterface')[:, common]
+
+        # virtual best: fastest configuration that solved an instance
+        best = np.where(solved, times, np.inf).min(axis=0)
+        best_solved = solved.any(axis=0)
+        best_times = np.where(best_solved, best, self.max_time)
+        wins = (solved & (times == best[None, :])).sum(axis=1)
+        sgm = self.shifted_geometric_mean(times)
+        sgm_best = self.shifted_geometric_mean(best_times)
+
+        lines = ['{:30s} {:>9s} {:>7s} {:>6s} {:>11s} {:>11s} {:>6s} {:>8s}'.format(
+            'configuration', 'instances', 'solved', 'wrong', 'sgm solver', 'sgm interf',
+            'wins', 'vs best')]
+        for i, label in enumerate(self.configurations):
+            lines.append('{:30s} {:9d} {:7d} {:6d} {:11.3f} {:11.3f} {:6d} {:8.3f}'.format(
+                label[:30], int(common.sum()), int(solved[i].sum()), int(wrong[i].sum()),
+                sgm[i], self.shifted_geometric_mean(et_times[i]), int(wins[i]),
+                sgm[i] / sgm_best if sgm_best > 0 else 1.0))
+        lines.append('{:30s} {:9d} {:7d} {:>6s} {:11.3f} {:>11s} {:>6s} {:8.3f}'.format(
+            'virtual best', int(common.sum()), int(best_solved.sum()), '', sgm_best, '', '',
+            1.0))
+        return '\n'.join(lines)
+
+
+    def profile_table(self, taus=None):
+        """
+        Returns a table of the performance profiles (SolverTime) over the instances
+        present for all configurations
+
+        Arguments
+        ---------
+        taus: list
+            Ratios to the fastest configuration
+        """
+        if taus is None:
+            taus = PROFILE_TAUS
+        common = self.present.all(axis=0)
+        profiles = self.profiles(self.times('SolverTime')[:, common],
+                                 self.solved()[:, common], taus)
+        lines = ['{:30s} '.format('tau') + ' '.join('{:>6g}'.format(tau) for tau in taus)]
+        for i, label in enumerate(self.configurations):
+            lines.append('{:30s} '.format(label[:30]) +
+                         ' '.join('{:6.3f}'.format(value) for value in profiles[i]))
+        return '\n'.join(lines)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+""" Comparison """
+
+import warnings
+
+import numpy as np
+
+from analysis import Analysis, OBJECTIVE_TOLERANCE, STATUS_NAMES, STATUS_MISSING
+from analysis import STATUS_OPTIMAL, STATUS_FEASIBLE, STATUS_INFEASIBLE
+
+# severity of status classes (STATUS_*), a status change to a higher severity
+# is a regression
+STATUS_SEVERITY = np.array([0, 1, 0, 2, 3, 3])
+
+class Comparison:
+    """
+    Compares benchmark results with a baseline: matches results by configuration and
+    instance and detects slowdowns, status changes and objective drift. Results of
+    repeated runs (several result directories per side) are combined by median.
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, max_time=60, threshold=0.2, min_time=1.0):
+        """
+        Arguments
+        ---------
+        max_time: float
+            Time of unsolved instances
+        threshold: float
+            Relative time difference below which times are considered noise
+        min_time: float
+            Absolute time difference (seconds) below which times are considered noise
+        """
+        self.max_time = max_time
+        self.threshold = threshold
+        self.min_time = min_time
+        self.keys = list()
+        self.baseline = dict()
+        self.new = dict()
+
+
+    def _load_side(self, paths, solufile):
+        # results of all runs of one side as arrays of runs x (configuration, instance)
+        runs = list()
+        for path in paths:
+            analysis = Analysis(self.max_time)
+            analysis.load([path])
+            if solufile is not None:
+                analysis.load_solu(solufile)
+            statuses = analysis.statuses()
+            times = analysis.times('SolverTime')
+            results = dict()
+            for i, conf_name in enumerate(analysis.configurations):
+                for j, name in enumerate(analysis.instances):
+                    if statuses[i, j] != STATUS_MISSING:
+                        results[(conf_name, name)] = (statuses[i, j], times[i, j],
+                                                      analysis.data['ObjectiveValue'][i, j],
+                                                      analysis.data['Direction'][i, j])
+            runs.append(results)
+        return runs
+
+
+    @staticmethod
+    def _combine(runs, keys):
+        # median time, time range, most frequent status and median objective of the runs
+        shape = (len(runs), len(keys))
+        statuses = np.full(shape, STATUS_MISSING)
+        times = np.full(shape, np.nan)
+        objectives = np.full(shape, np.nan)
+        directions = np.full(shape, np.nan)
+        for i, results in enumerate(runs):
+            for j, key in enumerate(keys):
+                if key in results:
+                    statuses[i, j], times[i, j], objectives[i, j], directions[i, j] = results[key]
+
+        counts = np.stack([(statuses == status).sum(axis=0)
+                           for status in range(len(STATUS_NAMES))])
+        # results without objective value (or time) in all runs are NaN
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return {
+                'status': counts.argmax(axis=0),
+                'time': np.nanmedian(times, axis=0),
+                'time_min': np.nanmin(times, axis=0),
+                'time_max': np.nanmax(times, axis=0),
+                'objective': np.nanmedian(objectives, axis=0),
+                'direction': np.nanmax(directions, axis=0),
+                'runs': (statuses != STATUS_MISSING).sum(axis=0)
+            }
+
+
+    def load(self, baseline_paths, new_paths, solufile=None):
+        """
+        Loads baseline and new results, results of both sides are matched by
+        configuration and instance name
+
+        Arguments
+        ---------
+        baseline_paths: list
+            Result directories of baseline runs
+        new_paths: list
+            Result directories of new runs
+        solufile: str
+            Solution file to check objectives
+        """
+        baseline_runs = self._load_side(baseline_paths, solufile)
+        new_runs = self._load_side(new_paths, solufile)
+        baseline_keys = set(key for results in baseline_runs for key in results)
+        new_keys = set(key for results in new_runs for key in results)
+        self.keys = sorted(baseline_keys & new_keys)
+        self.baseline = self._combine(baseline_runs, self.keys)
+        self.new = self._combine(new_runs, self.keys)
+
+
+    def ratios(self):
+        """
+        Returns the ratios of new to baseline times (> 1: slower)
+        """
+        return (np.maximum(self.new['time'], 1e-6) / np.maximum(self.baseline['time'], 1e-6))
+
+
+    @staticmethod
+    def _solved(side):
+        return np.isin(side['status'], [STATUS_OPTIMAL, STATUS_FEASIBLE, STATUS_INFEASIBLE])
+
+
+    def _time_changes(self):
+        # significant slowdowns and speedups of instances solved by both sides: time
+        # difference above thresholds and, with repeated runs, time ranges not overlapping
+        ratios = self.ratios()
+        both = self._solved(self.baseline) & self._solved(self.new)
+        difference = self.new['time'] - self.baseline['time']
+        repeated = (self.baseline['runs'] > 1) & (self.new['runs'] > 1)
+        slower = (both & (ratios > 1 + self.threshold) & (difference > self.min_time) &
+                  (~repeated | (self.new['time_min'] > self.baseline['time_max'])))
+        faster = (both & (1 / ratios > 1 + self.threshold) & (-difference > self.min_time) &
+                  (~repeated | (self.new['time_max'] < self.baseline['time_min'])))
+        return slower, faster
+
+
+    def _status_changes(self):
+        # status changes to a higher severity or between feasible and infeasible
+        baseline = self.baseline['status']
+        new = self.new['status']
+        feasible = [STATUS_OPTIMAL, STATUS_FEASIBLE]
+        switched = ((np.isin(baseline, feasible) & (new == STATUS_INFEASIBLE)) |
+                    ((baseline == STATUS_INFEASIBLE) & np.isin(new, feasible)))
+        worse = (baseline != new) & ((STATUS_SEVERITY[new] > STATUS_SEVERITY[baseline]) |
+                                     switched)
+        better = (baseline != new) & (STATUS_SEVERITY[new] < STATUS_SEVERITY[baseline])
+        return worse, better
+
+
+    def _objective_changes(self):
+        # objective changes of feasible results beyond the tolerance of Output (relative
+        # for objective values larger than 1)
+        feasible = [STATUS_OPTIMAL, STATUS_FEASIBLE]
+        both = np.isin(self.baseline['status'], feasible) & np.isin(self.new['status'], feasible)
+        difference = self.new['objective'] - self.baseline['objective']
+        difference = np.where(self.baseline['direction'] == 1, -difference, difference)
+        tolerance = OBJECTIVE_TOLERANCE * np.maximum(1, np.abs(self.baseline['objective']))
+        with np.errstate(invalid='ignore'):
+            worse = both & (difference > tolerance)
+            better = both & (difference < -tolerance)
+        return worse, better, difference / np.maximum(1, np.abs(self.baseline['objective']))
+
+
+    def report(self):
+        """
+        Returns the report of regressions, ranked by status changes, objective drift
+        and slowdowns, and whether regressions were found
+        """
+        # pylint: disable=too-many-locals
+        ratios = self.ratios()
+        slower, faster = self._time_changes()
+        status_worse, status_better = self._status_changes()
+        objective_worse, objective_better, drift = self._objective_changes()
+
+        entries = list()
+        for j in np.nonzero(status_worse)[0]:
+            rank = (STATUS_SEVERITY[self.new['status'][j]] -
+                    STATUS_SEVERITY[self.baseline['status'][j]])
+            entries.append((0, -rank, j, 'status', '%s -> %s' % (
+                STATUS_NAMES[self.baseline['status'][j]], STATUS_NAMES[self.new['status'][j]])))
+        for j in np.nonzero(objective_worse & ~status_worse)[0]:
+            entries.append((1, -drift[j], j, 'objective', '%.6g -> %.6g' % (
+                self.baseline['objective'][j], self.new['objective'][j])))
+        for j in np.nonzero(slower & ~status_worse)[0]:
+            entries.append((2, -ratios[j], j, 'slowdown', '%.3fs -> %.3fs (x%.2f)' % (
+                self.baseline['time'][j], self.new['time'][j], ratios[j])))
+
+        lines = ['{:10s} {:20s} {:30s} {:s}'.format('regression', 'configuration', 'instance',
+                                                     'change')]
+        for _, _, j, kind, change in sorted(entries):
+            conf_name, name = self.keys[j]
+            lines.append('{:10s} {:20s} {:30s} {:s}'.format(kind, conf_name[:20], name[:30],
+                                                             change))
+
+        both = self._solved(self.baseline) & self._solved(self.new)
+        speedup = np.exp(-np.mean(np.log(ratios[both]))) if both.any() else 1.0
+        lines.append('')
+        lines.append('%d results matched, %d regressions (%d status, %d objective, %d slowdown)'
+                     % (len(self.keys), len(entries), status_worse.sum(),
+                        (objective_worse & ~status_worse).sum(), (slower & ~status_worse).sum()))
+        lines.append('%d improvements (%d status, %d objective, %d speedup), '
+                     'geometric mean speedup %.3f' % (
+                         (status_better | objective_better | faster).sum(), status_better.sum(),
+                         objective_better.sum(), faster.sum(), speedup))
+        return '\n'.join(lines), len(entries) > 0
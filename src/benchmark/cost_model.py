@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+""" CostModel """
+
+import os
+import csv
+import glob
+import statistics
+
+from trace_reader import TraceReader
+
+class CostModel:
+    """
+    Estimates the cost and the memory of benchmark jobs from instance sizes
+    (instancedata.csv) and from previous benchmark runs (trace files)
+    """
+
+    def __init__(self):
+        self.sizes = dict()
+        self.times = dict()
+        self.times_model = dict()
+        self.memory = dict()
+        self.memory_model = dict()
+        self._time_per_size = None
+        self._memory_per_size = None
+
+
+    def load_instancedata(self, csvfile):
+        """
+        Loads instance sizes (number of nonzeros, else number of variables)
+        from a MINLPlib instance data file
+
+        Arguments
+        ---------
+        csvfile: str
+            Path to instance data file
+        """
+        if not os.path.exists(csvfile):
+            return
+
+        with open(csvfile, 'r') as fio:
+            for row in csv.DictReader(fio, delimiter=';'):
+                for column in ('nz', 'nvars'):
+                    try:
+                        self.sizes[row['name']] = int(row[column])
+                        break
+                    except (KeyError, ValueError, TypeError):
+                        continue
+        self._calibrate()
+
+
+    def load_history(self, result_path):
+        """
+        Loads elapsed times of a previous benchmark run
+
+        Arguments
+        ---------
+        result_path: str
+            Result directory of a previous benchmark run
+        """
+        for trcfile in glob.glob(os.path.join(result_path, '*', 'trace.trc')):
+            conf_name = os.path.basename(os.path.dirname(trcfile))
+            for record in TraceReader(trcfile).rows():
+                self._add_record(conf_name, record)
+        self._calibrate()
+
+
+    @staticmethod
+    def _value(record, keys):
+        # largest value of the given trace entries
+        value = None
+        for key in keys:
+            try:
+                element = float(record[key])
+            except (KeyError, ValueError, TypeError):
+                continue
+            if value is None or element > value:
+                value = element
+        return value
+
+
+    def _add_record(self, conf_name, record):
+        if record.get('InputFileName') is None:
+            return
+        name = os.path.splitext(record['InputFileName'])[0]
+        elapsed = self._value(record, ('SolverTime', 'ETInterface'))
+        if elapsed is not None:
+            self.times.setdefault((name, conf_name), list()).append(elapsed)
+            self.times_model.setdefault(name, list()).append(elapsed)
+        memory = self._value(record, ('PeakRSS',))
+        if memory is not None:
+            self.memory.setdefault((name, conf_name), list()).append(memory)
+            self.memory_model.setdefault(name, list()).append(memory)
+
+
+    def _ratio(self, values):
+        # median of value per unit of instance size, used for instances without history
+        ratios = list()
+        for name, model_values in values.items():
+            if self.sizes.get(name, 0) > 0:
+                ratios.append(statistics.median(model_values) / self.sizes[name])
+        return statistics.median(ratios) if len(ratios) > 0 else None
+
+
+    def _calibrate(self):
+        self._time_per_size = self._ratio(self.times_model)
+        self._memory_per_size = self._ratio(self.memory_model)
+
+
+    def cost(self, name, conf_name):
+        """
+        Returns the estimated cost of a job or None if unknown. The cost is the
+        expected elapsed time if history is available, else the instance size.
+
+        Arguments
+        ---------
+        name: str
+            Model name
+        conf_name: str
+            Configuration name
+        """
+        if (name, conf_name) in self.times:
+            return statistics.median(self.times[(name, conf_name)])
+        if name in self.times_model:
+            return statistics.median(self.times_model[name])
+        if name not in self.sizes:
+            return None
+        if len(self.times_model) == 0:
+            return self.sizes[name]
+        if self._time_per_size is not None:
+            return self.sizes[name] * self._time_per_size
+        return None
+
+
+    def runtime(self, name, conf_name, max_time, kill_time):
+        """
+        Returns the predicted elapsed time of a job: the longest elapsed time of
+        previous runs if available, else max_time. Bounded by max_time + kill_time.
+
+        Arguments
+        ---------
+        name: str
+            Model name
+        conf_name: str
+            Configuration name
+        max_time: int
+            Max allowed time of the job
+        kill_time: int
+            Time (+max_time) after which the job is killed
+        """
+        # pylint: disable=too-many-arguments
+        runtime = max_time
+        if (name, conf_name) in self.times:
+            runtime = max(self.times[(name, conf_name)])
+        return min(runtime, max_time + kill_time)
+
+
+    def peak_memory(self, name, conf_name):
+        """
+        Returns the estimated peak memory (MB) of a job: the largest peak resident set
+        size of previous runs if available, else estimated by the instance size. Returns
+        None if unknown.
+
+        Arguments
+        ---------
+        name: str
+            Model name
+        conf_name: str
+            Configuration name
+        """
+        if (name, conf_name) in self.memory:
+            return max(self.memory[(name, conf_name)])
+        if name in self.memory_model:
+            return max(self.memory_model[name])
+        if name in self.sizes and self._memory_per_size is not None:
+            return self.sizes[name] * self._memory_per_size
+        return None
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+""" CpuTopology """
+
+import os
+import glob
+
+class CpuTopology:
+    """
+    Physical cores of the machine read from /sys/devices/system/cpu
+    Hands out dedicated cores to benchmark jobs, aware of SMT siblings and NUMA nodes
+    """
+
+    def __init__(self, mode='core', sysfs='/sys/devices/system/cpu'):
+        """
+        Arguments
+        ---------
+        mode: str
+            'core': a job gets a physical core with all its SMT siblings
+            'cpu': a job gets one hardware thread of a physical core, the siblings stay idle
+        sysfs: str
+            Path to cpu devices in sysfs
+        """
+        self.mode = mode
+        self.sysfs = sysfs
+        self.cores = self._cores()
+        self.free = list(self.cores)
+
+
+    @staticmethod
+    def _parse_cpulist(cpulist):
+        cpus = list()
+        for item in cpulist.strip().split(','):
+            if len(item) == 0:
+                continue
+            if '-' in item:
+                first, last = item.split('-')
+                cpus += range(int(first), int(last) + 1)
+            else:
+                cpus.append(int(item))
+        return cpus
+
+
+    def _read_cpulist(self, cpu, name):
+        path = os.path.join(self.sysfs, 'cpu%d' % cpu, 'topology', name)
+        if not os.path.exists(path):
+            return [cpu]
+        with open(path, 'r') as fio:
+            return self._parse_cpulist(fio.read())
+
+
+    def _node(self, cpu):
+        nodes = glob.glob(os.path.join(self.sysfs, 'cpu%d' % cpu, 'node[0-9]*'))
+        if len(nodes) == 0:
+            return 0
+        return int(os.path.basename(nodes[0])[4:])
+
+
+    def _cores(self):
+        # physical cores (tuple of SMT siblings) per NUMA node
+        allowed = os.sched_getaffinity(0)
+        nodes = dict()
+        for cpu in sorted(allowed):
+            siblings = [c for c in self._read_cpulist(cpu, 'thread_siblings_list') if c in allowed]
+            core = tuple(sorted(siblings)) if cpu in siblings else (cpu,)
+            cores = nodes.setdefault(self._node(cpu), list())
+            if core not in cores:
+                cores.append(core)
+
+        # alternate NUMA nodes, so that parallel jobs spread over all nodes
+        cores = list()
+        node_cores = [nodes[node] for node in sorted(nodes)]
+        for i in range(max([len(c) for c in node_cores] + [0])):
+            for node_core in node_cores:
+                if i < len(node_core):
+                    cores.append(node_core[i])
+        return cores
+
+
+    def n_cores(self):
+        """
+        Returns the number of physical cores available to jobs
+        """
+        return len(self.cores)
+
+
+    def allocate(self, n_cores=1):
+        """
+        Reserves physical cores. Returns the cpus to be used or None if not enough
+        cores are free.
+
+        Arguments
+        ---------
+        n_cores: int
+            Number of physical cores
+        """
+        if n_cores > len(self.free):
+            return None
+        cores = self.free[:n_cores]
+        self.free = self.free[n_cores:]
+        if self.mode == 'cpu':
+            return sorted(core[0] for core in cores)
+        return sorted(cpu for core in cores for cpu in core)
+
+
+    def release(self, cpus):
+        """
+        Releases physical cores reserved by allocate
+
+        Arguments
+        ---------
+        cpus: list
+            Cpus returned by allocate
+        """
+        for core in self.cores:
+            if core[0] in cpus and core not in self.free:
+                self.free.append(core)
+        self.free.sort(key=self.cores.index)
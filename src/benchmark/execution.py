@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+""" Execution """
+
+import os
+import time
+import signal
+import asyncio
+import subprocess
+
+from process_monitor import ProcessMonitor
+from output_capture import OutputCapture
+
+# seconds between two samples of the resource usage of a running job
+MONITOR_INTERVAL = 0.2
+
+# seconds between two checks whether a job has ended (if process file descriptors are not
+# available)
+EXIT_INTERVAL = 0.01
+
+# seconds between SIGTERM and SIGKILL to the process group of a job that exceeds its
+# timeout
+KILL_GRACE = 5
+
+class Execution:
+    """
+    Runs the command of a benchmark job as child process
+    Streams its output to stdout.txt / stderr.txt, collects the elapsed time, its resource
+    usage and whether it had to be killed
+    """
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+
+    def __init__(self, cmd, workdir, timeout, cpus=None, max_output=None):
+        # pylint: disable=too-many-arguments
+        self.cmd = cmd
+        self.workdir = workdir
+        self.timeout = timeout
+        self.cpus = cpus
+        self.max_output = max_output
+        self.stdout = ''
+        self.stderr = ''
+        self.returncode = None
+        self.killed = False
+        self.kill_signal = None
+        self.kill_time = None
+        self.start = None
+        self.out_of_memory = False
+        self.monitor = None
+        self.time = None
+        self.output = None
+
+
+    def _captures(self):
+        captures = [OutputCapture(os.path.join(self.workdir, name), self.max_output)
+                    for name in ('stdout.txt', 'stderr.txt')]
+        for capture in captures:
+            capture.open()
+        return captures
+
+
+    async def run_async(self):
+        """
+        Runs the command within the running event loop until it is finished or killed
+        """
+        # pylint: disable=subprocess-popen-preexec-fn,consider-using-with
+        # the job is reaped by the execution (not by the child watcher of asyncio) to get
+        # its resource usage
+        oom_kills = ProcessMonitor.oom_kills()
+        captures = self._captures()
+        self.start = time.time()
+        process = subprocess.Popen(self.cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   preexec_fn=self._preexec)
+        self.monitor = ProcessMonitor(process.pid)
+        sampler = asyncio.ensure_future(self.monitor.watch(MONITOR_INTERVAL))
+        streams = await self._streams(process)
+        output = asyncio.gather(*[capture.read(reader)
+                                  for capture, (reader, _) in zip(captures, streams)])
+        try:
+            await asyncio.wait_for(self._exited(process), self.timeout)
+        except asyncio.TimeoutError:
+            await self.terminate(process.pid, lambda: self._exited(process))
+        except asyncio.CancelledError:
+            self.signal_group(process.pid, signal.SIGKILL)
+            output.cancel()
+            await asyncio.gather(output, return_exceptions=True)
+            await self._exited(process)
+            for (_, transport), capture in zip(streams, captures):
+                transport.close()
+                capture.close()
+            raise
+        finally:
+            sampler.cancel()
+        self.time = time.time() - self.start
+
+        # processes left by the job keep its output open
+        self.kill_leftovers(process.pid)
+        await output
+        for _, transport in streams:
+            transport.close()
+        self._store(process.returncode, captures, oom_kills)
+
+
+    @staticmethod
+    async def _streams(process):
+        # stream readers (and their transports) of stdout and stderr of the job
+        loop = asyncio.get_event_loop()
+        streams = list()
+        for pipe in (process.stdout, process.stderr):
+            reader = asyncio.StreamReader()
+            transport, _ = await loop.connect_read_pipe(
+                lambda reader=reader: asyncio.StreamReaderProtocol(reader), pipe)
+            streams.append((reader, transport))
+        return streams
+
+
+    def _reap(self, process):
+        # collects exit status and resource usage of the job if it has ended (without
+        # blocking), returns whether it has ended
+        if process.returncode is not None:
+            return True
+        pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+        if pid == 0:
+            return False
+        if os.WIFSIGNALED(status):
+            process.returncode = -os.WTERMSIG(status)
+        else:
+            process.returncode = os.WEXITSTATUS(status)
+        self.monitor.finish([usage])
+        return True
+
+
+    async def _exited(self, process):
+        # returns when the job has ended and is reaped, unlike waiting for its output also
+        # if processes it started still hold its output open
+        if hasattr(os, 'pidfd_open') and process.returncode is None:
+            fd = os.pidfd_open(process.pid)
+            loop = asyncio.get_event_loop()
+            future = loop.create_future()
+            loop.add_reader(fd, lambda: future.done() or future.set_result(None))
+            try:
+                await future
+            finally:
+                loop.remove_reader(fd)
+                os.close(fd)
+        while not self._reap(process):
+            await asyncio.sleep(EXIT_INTERVAL)
+
+
+    def signal_group(self, pgid, sig):
+        """
+        Sends a signal to the process group of the job and records it as kill signal
+
+        Arguments
+        ---------
+        pgid: int
+            Process group id of the job (pid of its first process)
+        sig: int
+            Signal
+        """
+        self.kill_signal = int(sig)
+        self.kill_time = time.time() - self.start
+        try:
+            os.killpg(pgid, sig)
+        except ProcessLookupError:
+            pass
+
+
+    async def terminate(self, pgid, wait):
+        """
+        Terminates the process group of a job that exceeded its timeout: SIGTERM, and
+        SIGKILL if the job does not end within KILL_GRACE seconds
+
+        Arguments
+        ---------
+        pgid: int
+            Process group id of the job (pid of its first process)
+        wait: function
+            Returns an awaitable that waits for the end of the job
+        """
+        self.killed = True
+        self.signal_group(pgid, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(wait(), KILL_GRACE)
+        except asyncio.TimeoutError:
+            self.signal_group(pgid, signal.SIGKILL)
+            await wait()
+
+
+    @staticmethod
+    def kill_leftovers(pgid):
+        """
+        Kills processes of a finished job that are still running, e.g. solver
+        processes orphaned by the job
+
+        Arguments
+        ---------
+        pgid: int
+            Process group id of the job (pid of its first process)
+        """
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+    def _preexec(self):
+        # runs in the child before exec, the affinity is inherited by the whole process tree
+        # own session and process group: a Ctrl-C of the benchmark (graceful stop) does not
+        # reach the job and the job can be killed incl. all processes it started
+        os.setsid()
+        if self.cpus is not None:
+            os.sched_setaffinity(0, self.cpus)
+
+
+    def _store(self, returncode, captures, oom_kills):
+        self.returncode = returncode
+        self.detect_out_of_memory(oom_kills)
+        for capture in captures:
+            capture.close()
+        self.stdout = captures[0].text()
+        self.stderr = captures[1].text()
+
+
+    def load_output(self):
+        """
+        Reads the end of stdout / stderr of a job that wrote them directly to the working
+        directory and limits their size
+        """
+        self.stdout = OutputCapture.load(os.path.join(self.workdir, 'stdout.txt'),
+                                         self.max_output)
+        self.stderr = OutputCapture.load(os.path.join(self.workdir, 'stderr.txt'),
+                                         self.max_output)
+
+
+    def detect_out_of_memory(self, oom_kills):
+        """
+        Sets whether the finished process was killed by the out-of-memory killer
+
+        Arguments
+        ---------
+        oom_kills: int
+            OOM kill counter of the cgroup before the process was started
+        """
+        # Killed without being asked to is a sign of the OOM killer. The OOM kill counter of
+        # the cgroup also catches killed solver subprocesses, but it is shared with jobs
+        # running in parallel, so it is only trusted if the job failed.
+        oom_kills_after = ProcessMonitor.oom_kills()
+        self.out_of_memory = ((self.returncode == -signal.SIGKILL and not self.killed) or
+                              (self.returncode != 0 and oom_kills is not None and
+                               oom_kills_after is not None and oom_kills_after > oom_kills))
@@ -2,7 +2,22 @@
 """ Job """
 
 import os
+import fcntl
 import shutil
+import fnmatch
+import warnings
+
+# configuration entries that are no GAMS options
+CONFIGURATION_META = ['id', 'weight']
+
+# ioctl that shares the data blocks of a file with a new file (copy-on-write)
+FICLONE = 0x40049409
+
+# bytes of a model file read at once when it is prefetched
+PREFETCH_CHUNK_SIZE = 1024**2
+
+# directories of writable model files that were warned about (their files are copied)
+WRITABLE_MODEL_PATHS = set()
 
 class Job:
     """
@@ -16,12 +31,40 @@ class Job:
         self.name = name
         self.configuration = configuration
         self.workdir = os.path.abspath(workdir)
+        self.rundir = self.workdir
         self.model_file = model_file
         self.max_time = max_time
         self.kill_time = kill_time
         self.model_status = None
         self.objective = None
         self.objective_estimate = None
+        self.cpus = None
+        self.repeat = None
+        self.model_link = None
+        self.pack = None
+        self.weight = self._weight(configuration)
+
+
+    @staticmethod
+    def _weight(configuration):
+        # number of cores used by the job: explicit weight, else GAMS option threads
+        weight = 1
+        for key, value in configuration:
+            if key == 'weight':
+                return max(int(value), 1)
+            if key.lower() == 'threads':
+                weight = int(value)
+                if weight <= 0:
+                    weight += os.cpu_count()
+        return max(weight, 1)
+
+
+    def options(self):
+        """
+        Returns the GAMS options of the job configuration
+        """
+        return [(key, value) for (key, value) in self.configuration
+                if key not in CONFIGURATION_META]
 
 
     def filename(self):
@@ -31,17 +74,172 @@ class Job:
         return os.path.basename(self.model_file)
 
 
+    def key(self):
+        """
+        Returns the key of the job among the jobs of its configuration: file name,
+        followed by the repeat index for repeated jobs
+        """
+        if self.repeat is None:
+            return self.filename()
+        return '%s/repeat%s' % (self.filename(), self.repeat)
+
+
+    def is_finished(self):
+        """
+        Returns whether the job has been run before, i.e. its trace file exists (in the
+        working directory or the result pack)
+        """
+        path = os.path.join(self.workdir, 'trace.trc')
+        if self.pack is not None and self.pack.contains(path):
+            return True
+        return os.path.exists(path)
+
+
+    def trace_file(self):
+        """
+        Returns the trace file of a finished job: its path, or a file object if it is
+        stored in the result pack
+        """
+        path = os.path.join(self.workdir, 'trace.trc')
+        if self.pack is not None and self.pack.contains(path):
+            return self.pack.open_text(path)
+        return path
+
+
     def init_workdir(self):
         """
-        Creating the working directory for the job and copying model file
+        Creating the working directory for the job, the directory the job is run in (if
+        different, e.g. on a RAM disk) and providing the model file (read-only). Returns
+        False if the job has been finished before.
         """
 
+        if self.is_finished():
+            return False
+        self.create_workdir()
+        return True
+
+
+    def create_workdir(self):
+        """
+        Creates the working directory (and run directory) of a job that has not been
+        finished, removing files of earlier runs, and provides the model file
+        """
         if os.path.exists(self.workdir):
-            if not os.path.exists(os.path.join(self.workdir, 'trace.trc')):
-                shutil.rmtree(self.workdir)
-            else:
-                return False
+            shutil.rmtree(self.workdir)
         os.makedirs(self.workdir)
-        model_file = os.path.basename(self.model_file)
-        shutil.copyfile(self.model_file, os.path.join(self.workdir, model_file))
-        return True
+        if self.rundir != self.workdir:
+            if os.path.exists(self.rundir):
+                shutil.rmtree(self.rundir)
+            os.makedirs(self.rundir)
+        target = os.path.join(self.rundir, os.path.basename(self.model_file))
+        self.model_link = self._link(os.path.abspath(self.model_file), target)
+
+
+    def prefetch_model(self):
+        """
+        Reads the model file into the page cache, so that the job does not wait for the
+        file system (e.g. NFS) when it reads its model
+        """
+        with open(self.model_file, 'rb') as fio:
+            # read-ahead of the whole file, the reads wait for it where it is ignored
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fio.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            while fio.read(PREFETCH_CHUNK_SIZE):
+                pass
+
+
+    def artifacts(self, patterns=None):
+        """
+        Returns the names of the files the job left in its run directory, the model file
+        excluded. The trace file, which marks the job as finished, comes last.
+
+        Arguments
+        ---------
+        patterns: list
+            File name patterns of the returned files (default: all files)
+        """
+        names = list()
+        for name in os.listdir(self.rundir):
+            if name == self.filename() or not os.path.isfile(os.path.join(self.rundir, name)):
+                continue
+            if patterns is None or any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                names.append(name)
+        return sorted(names, key=lambda name: name == 'trace.trc')
+
+
+    def persist(self, artifacts):
+        """
+        Copies the artifacts of a job run outside of its working directory into the
+        working directory and removes the run directory
+
+        Arguments
+        ---------
+        artifacts: list
+            File name patterns of the files that are kept
+        """
+        if self.rundir == self.workdir:
+            return
+        for name in self.artifacts(artifacts):
+            shutil.copyfile(os.path.join(self.rundir, name), os.path.join(self.workdir, name))
+        self.remove_rundir()
+
+
+    def remove_rundir(self):
+        """
+        Removes the directory the job was run in, if it is not the working directory
+        """
+        if self.rundir != self.workdir:
+            shutil.rmtree(self.rundir, ignore_errors=True)
+
+
+    def remove_workdir(self):
+        """
+        Removes the working directory and the run directory of the job, e.g. once its
+        files are stored in the result pack
+        """
+        self.remove_rundir()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        if self.repeat is not None:
+            # directory of the model, if all its repeats are removed
+            try:
+                os.rmdir(os.path.dirname(self.workdir))
+            except OSError:
+                pass
+
+
+    @staticmethod
+    def _link(source, target):
+        # cheapest way to provide the model file: reflink (copy-on-write clone), hardlink
+        # (same file system), symlink or copy. Returns the method. Jobs must not change
+        # their model: own files (reflink, copy) are made read-only, the testset file is
+        # only shared (hardlink, symlink) if it is read-only already, its permissions
+        # are never changed. Copies of a writable testset are warned about once per
+        # directory.
+        try:
+            with open(source, 'rb') as fsource, open(target, 'wb') as ftarget:
+                fcntl.ioctl(ftarget.fileno(), FICLONE, fsource.fileno())
+            os.chmod(target, 0o444)
+            return 'reflink'
+        except OSError:
+            if os.path.exists(target):
+                os.remove(target)
+        if os.stat(source).st_mode & 0o222 != 0:
+            if os.path.dirname(source) not in WRITABLE_MODEL_PATHS:
+                WRITABLE_MODEL_PATHS.add(os.path.dirname(source))
+                warnings.warn("model files in %s are writable and therefore copied, make "
+                              "them read-only to share them (hardlink, symlink)" %
+                              os.path.dirname(source))
+        else:
+            try:
+                os.link(source, target)
+                return 'hardlink'
+            except OSError:
+                pass
+            try:
+                os.symlink(source, target)
+                return 'symlink'
+            except OSError:
+                pass
+        shutil.copyfile(source, target)
+        os.chmod(target, 0o444)
+        return 'copy'
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+""" JuliaPool """
+
+import os
+import time
+import signal
+import asyncio
+import subprocess
+
+from process_monitor import ProcessMonitor
+from execution import MONITOR_INTERVAL
+
+# prefix of lines the worker uses to talk to the benchmark
+WORKER_MARKER = '@@benchmark'
+
+# julia worker: loads JuMP and GAMS once and runs job programs read from stdin
+WORKER_PROGRAM = """
+using JuMP
+using GAMS
+
+function warmup()
+    m = Model(GAMS.Optimizer)
+    set_optimizer_attribute(m, GAMS.SysDir(), "%s")
+    set_optimizer_attribute(m, MOI.Silent(), true)
+    @variable(m, 0 <= x <= 1)
+    @NLobjective(m, Min, (x - 0.5)^2)
+    JuMP.optimize!(m)
+end
+
+function serve()
+    while true
+        line = readline(stdin)
+        if isempty(line)
+            break
+        end
+        prog, stdout_file, stderr_file = split(line, "\\t")
+        status = "ok"
+        open(stdout_file, "w") do out
+            open(stderr_file, "w") do err
+                redirect_stdout(out) do
+                    redirect_stderr(err) do
+                        try
+                            Base.include(Module(), prog)
+                        catch e
+                            status = "error"
+                            showerror(stderr, e, catch_backtrace())
+                        end
+                    end
+                end
+            end
+        end
+        println("%s done " * status)
+        flush(stdout)
+    end
+end
+
+try
+    warmup()
+catch
+end
+println("%s ready")
+flush(stdout)
+serve()
+"""
+
+class JuliaWorker:
+    """
+    Long-lived julia process that runs the JuMP programs of benchmark jobs
+    """
+
+    def __init__(self, sysdir, sysimage=None):
+        self.sysdir = sysdir
+        self.sysimage = sysimage
+        self.process = None
+
+
+    async def start(self):
+        """
+        Starts julia, loads JuMP and GAMS and waits until the worker is ready
+        """
+        program = WORKER_PROGRAM % (self.sysdir, WORKER_MARKER, WORKER_MARKER)
+        julia = ['julia']
+        if self.sysimage is not None:
+            julia += ['--sysimage', self.sysimage]
+        self.process = await asyncio.create_subprocess_exec(
+            *julia, '-e', program, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, start_new_session=True)
+        await self._message()
+
+
+    def alive(self):
+        """
+        Returns whether the julia process is running
+        """
+        return self.process is not None and self.process.returncode is None
+
+
+    async def _message(self):
+        # next message of the worker, None if the worker died
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                await self.process.wait()
+                return None
+            line = line.decode("utf-8", errors="replace").strip()
+            if line.startswith(WORKER_MARKER):
+                return line[len(WORKER_MARKER):].strip()
+
+
+    def _set_affinity(self, cpus):
+        # all threads of the worker, so that solver processes it starts inherit the cpus
+        for tid in os.listdir('/proc/%d/task' % self.process.pid):
+            os.sched_setaffinity(int(tid), cpus)
+
+
+    async def run(self, prog, execution):
+        """
+        Runs a job program and fills the execution. Kills the worker if the job
+        exceeds the timeout of the execution.
+
+        Arguments
+        ---------
+        prog: str
+            Path to julia program of the job
+        execution: Execution
+            Execution of the job, holds working directory, timeout and cpus
+        """
+        stdout_file = os.path.join(execution.workdir, 'stdout.txt')
+        stderr_file = os.path.join(execution.workdir, 'stderr.txt')
+        if execution.cpus is not None:
+            self._set_affinity(execution.cpus)
+
+        oom_kills = ProcessMonitor.oom_kills()
+        execution.monitor = ProcessMonitor(self.process.pid)
+        execution.monitor.reset()
+        sampler = asyncio.ensure_future(execution.monitor.watch(MONITOR_INTERVAL))
+        execution.start = time.time()
+        self.process.stdin.write(("%s\t%s\t%s\n" % (prog, stdout_file, stderr_file)).encode())
+        try:
+            message = await asyncio.wait_for(self._message(), execution.timeout)
+        except asyncio.TimeoutError:
+            message = None
+            await execution.terminate(self.process.pid, self.process.wait)
+            await self.stop()
+        except asyncio.CancelledError:
+            await self.stop()
+            raise
+        finally:
+            sampler.cancel()
+        execution.time = time.time() - execution.start
+        # the worker is still alive, its accumulated resource usage is exact
+        if message is not None:
+            execution.monitor.complete()
+
+        if message == 'done ok':
+            execution.returncode = 0
+        elif message is not None:
+            execution.returncode = 1
+        else:
+            execution.returncode = self.process.returncode
+        execution.detect_out_of_memory(oom_kills)
+        execution.load_output()
+
+
+    async def stop(self):
+        """
+        Stops the worker incl. all processes it started
+        """
+        if self.alive():
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        await self.process.wait()
+
+
+class JuliaPool:
+    """
+    Pool of long-lived julia workers, one per job running in parallel. Workers that
+    crashed or were killed due to a timeout are replaced by new ones.
+    """
+
+    def __init__(self, sysdir, sysimage=None):
+        self.sysdir = sysdir
+        self.sysimage = sysimage
+        self.idle = list()
+
+
+    async def run(self, prog, execution):
+        """
+        Runs a job program on an idle worker and fills the execution
+
+        Arguments
+        ---------
+        prog: str
+            Path to julia program of the job
+        execution: Execution
+            Execution of the job, holds working directory, timeout and cpus
+        """
+        if len(self.idle) > 0:
+            worker = self.idle.pop()
+        else:
+            worker = JuliaWorker(self.sysdir, self.sysimage)
+            await worker.start()
+        if worker.alive():
+            await worker.run(prog, execution)
+        if worker.alive():
+            self.idle.append(worker)
+        else:
+            await worker.stop()
+
+
+    async def stop(self):
+        """
+        Stops all workers
+        """
+        while len(self.idle) > 0:
+            await self.idle.pop().stop()
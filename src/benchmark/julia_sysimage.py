@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+""" JuliaSysimage """
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+
+# directory of built system images
+SYSIMAGE_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'gams-benchmark')
+
+# number of (small) testset models solved to record the methods to be compiled
+PRECOMPILE_MODELS = 3
+
+# precompile workload: solves models of the testset through JuMP and GAMS.jl
+WORKLOAD_PROGRAM = """
+using JuMP
+using GAMS
+
+for file in [%s]
+    mod = Module()
+    try
+        Core.eval(mod, :(using JuMP))
+        Base.include(mod, file)
+        m = getfield(mod, :m)
+        JuMP.set_optimizer(m, GAMS.Optimizer)
+        set_optimizer_attribute(m, GAMS.SysDir(), "%s")
+        set_optimizer_attribute(m, GAMS.WorkDir(), mktempdir())
+        set_optimizer_attribute(m, MOI.Silent(), true)
+        set_optimizer_attribute(m, MOI.TimeLimitSec(), 1)
+        JuMP.optimize!(m)
+    catch e
+        showerror(stderr, e)
+    end
+end
+"""
+
+# builds the system image with PackageCompiler
+BUILD_PROGRAM = """
+using PackageCompiler
+create_sysimage([:JuMP, :GAMS]; sysimage_path="%s", precompile_execution_file="%s")
+"""
+
+class JuliaSysimage:
+    """
+    Julia system image with JuMP and GAMS.jl compiled in, built by PackageCompiler
+    and cached per julia / JuMP / GAMS.jl version. If a version is unknown, the image
+    is rebuilt on every use.
+    """
+
+    def __init__(self, sysdir, version_julia, version_jump, version_gamsjl,
+                 cache=SYSIMAGE_CACHE):
+        # pylint: disable=too-many-arguments
+        self.sysdir = sysdir
+        self.cache = cache
+        self.versions = (version_julia, version_jump, version_gamsjl)
+
+
+    def cached(self):
+        """
+        Returns whether the system image is cached: all versions are known, else an
+        image of other package versions could be taken
+        """
+        return all(version != '' for version in self.versions)
+
+
+    def path(self):
+        """
+        Returns the path of the cached system image (of the last build if not cached)
+        """
+        if sys.platform == 'win32':
+            ext = 'dll'
+        elif sys.platform == 'darwin':
+            ext = 'dylib'
+        else:
+            ext = 'so'
+        if not self.cached():
+            return os.path.join(self.cache, 'julia-unversioned.%s' % ext)
+        return os.path.join(self.cache, 'julia-%s_jump-%s_gamsjl-%s.%s' % (self.versions + (ext,)))
+
+
+    def build(self, model_path):
+        """
+        Builds the system image if it is not cached yet (or not cached at all).
+        Returns its path.
+
+        Arguments
+        ---------
+        model_path: str
+            Directory of julia models, the smallest are used as precompile workload
+        """
+        path = self.path()
+        if self.cached() and os.path.exists(path):
+            return path
+        if not self.cached():
+            print("Julia, JuMP or GAMS.jl version unknown: system image is not cached")
+        print("Building julia system image %s..." % path)
+
+        models = [os.path.join(model_path, f) for f in os.listdir(model_path) if f.endswith('.jl')]
+        models = sorted(models, key=os.path.getsize)[:PRECOMPILE_MODELS]
+
+        os.makedirs(self.cache, exist_ok=True)
+        tmpdir = tempfile.mkdtemp(dir=self.cache)
+        try:
+            workload = os.path.join(tmpdir, 'workload.jl')
+            with open(workload, 'w') as fio:
+                fio.write(WORKLOAD_PROGRAM % (', '.join('"%s"' % os.path.abspath(f)
+                                                        for f in models), self.sysdir))
+            # build next to the cache entry and move it, so that the cache never holds
+            # a partially written image
+            tmppath = os.path.join(tmpdir, os.path.basename(path))
+            process = subprocess.run(['julia', '-e', BUILD_PROGRAM % (tmppath, workload)],
+                                     check=False)
+            if process.returncode != 0 or not os.path.exists(tmppath):
+                raise Exception("Can't build julia system image")
+            os.replace(tmppath, path)
+        finally:
+            shutil.rmtree(tmpdir)
+        return path
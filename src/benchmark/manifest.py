@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+""" Manifest """
+
+import os
+import json
+import sqlite3
+
+from trace_record import TraceRecord
+
+class Manifest:
+    """
+    Database of finished jobs and their trace records in the result directory,
+    a resumed benchmark finds its finished jobs without probing their working
+    directories
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.new = True
+        self.connection = None
+
+
+    def open(self):
+        """
+        Opens (creates) the database
+        """
+        self.new = not os.path.exists(self.path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS jobs (configuration TEXT, "
+                                "filename TEXT, record TEXT, "
+                                "PRIMARY KEY (configuration, filename))")
+        self.connection.commit()
+
+
+    def records(self):
+        """
+        Returns the trace records of finished jobs by configuration and job key
+        """
+        records = dict()
+        for conf_name, filename, record in self.connection.execute(
+                "SELECT configuration, filename, record FROM jobs"):
+            trace = TraceRecord(filename)
+            for key, value in json.loads(record).items():
+                if key in trace.record:
+                    trace.record[key] = value
+            records.setdefault(conf_name, dict())[filename] = trace
+        return records
+
+
+    def add(self, conf_name, trace_record, key=None):
+        """
+        Adds (replaces) the trace record of a finished job, stored with the next commit
+
+        Arguments
+        ---------
+        conf_name: str
+            Configuration name of the job
+        trace_record: TraceRecord
+            Trace record of the job
+        key: str
+            Key of the job (default: input file name)
+        """
+        if key is None:
+            key = trace_record.record['InputFileName']
+        self.connection.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?)",
+                                (conf_name, key, json.dumps(trace_record.record)))
+
+
+    def commit(self):
+        """
+        Stores the added trace records
+        """
+        self.connection.commit()
+
+
+    def close(self):
+        """
+        Stores the added trace records and closes the database
+        """
+        if self.connection is not None:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
@@ -46,6 +46,8 @@ class Output:
                 output += self._output_objective(job, result) + ' │ '
             if col == 'time':
                 output += self._output_time(job, result) + ' │ '
+            if col == 'resources':
+                output += self._output_resources(result) + ' │ '
         print(output)
 
 
@@ -59,7 +61,9 @@ class Output:
 
     @staticmethod
     def _output_name(job):
-        return '{:35s}'.format(job.filename())
+        if job.repeat is None:
+            return '{:35s}'.format(job.filename())
+        return '{:35s}'.format('%s #%d' % (job.filename(), job.repeat))
 
 
     @staticmethod
@@ -104,7 +108,11 @@ class Output:
 
     @staticmethod
     def _output_status(result):
-        if result.stdout:
+        # pylint: disable=too-many-branches
+        if result.out_of_memory():
+            color = BColors.FAIL
+            status = 'oom'
+        elif result.stdout:
             color = BColors.FAIL
             status = 'stdout'
         elif result.stderr:
@@ -119,6 +127,9 @@ class Output:
         elif result.solver_status() == 3:
             color = BColors.WARNING
             status = 'maxtime'
+        elif result.solver_status() == 12:
+            color = BColors.WARNING
+            status = 'notrun'
         elif result.solver_status() != 1:
             color = BColors.FAIL
             status = 'fail'
@@ -213,7 +224,10 @@ class Output:
     def _output_time(job, result):
         color = BColors.OKGREEN
         status = 'ok'
-        if result.solver_time() is not None:
+        if result.kill_signal() is not None:
+            color = BColors.FAIL
+            status = 'killed'
+        elif result.solver_time() is not None:
             if result.solver_time() > job.max_time and result.solver_status() != 3:
                 color = BColors.FAIL
                 status = 'fail'
@@ -241,3 +255,21 @@ class Output:
         msg += '{:7s}'.format(status)
         msg += '{:s}'.format(BColors.ENDC)
         return msg
+
+
+    @staticmethod
+    def _output_resources(result):
+        msg = ''
+        for value, fmt, width in ((result.peak_rss(), '{:8.1f} ', 9),
+                                  (result.cpu_user(), '{:8.2f} ', 9),
+                                  (result.cpu_system(), '{:8.2f} ', 9),
+                                  (result.context_switches()[0], '{:8d} ', 9),
+                                  (result.context_switches()[1], '{:8d} ', 9),
+                                  (result.io_read(), '{:8.1f} ', 9),
+                                  (result.io_write(), '{:8.1f} ', 9),
+                                  (result.n_processes(), '{:3d}', 3)):
+            if value is None:
+                msg += ' ' * width
+            else:
+                msg += fmt.format(value)
+        return msg
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+""" OutputCapture """
+
+import os
+
+# bytes of the end of the output kept in memory
+TAIL_SIZE = 4096
+
+# bytes read from the output of a job at once
+CHUNK_SIZE = 65536
+
+def _copy(fin, fout, size):
+    # copies size bytes between files in chunks
+    while size > 0:
+        data = fin.read(min(size, CHUNK_SIZE))
+        if not data:
+            break
+        fout.write(data)
+        size -= len(data)
+
+
+class OutputCapture:
+    """
+    Streams the output (stdout or stderr) of a job to a file while it is produced. With a
+    size limit, the file keeps the head and the tail of the output (half of the limit
+    each): the output after the head is written to a ring region of the file that is
+    put in order when the output ends. Only the last TAIL_SIZE bytes are kept in memory.
+    """
+
+    def __init__(self, path, limit=None):
+        """
+        Arguments
+        ---------
+        path: str
+            Path to output file
+        limit: int
+            Max size (bytes) of the output file (default: unlimited)
+        """
+        self.path = path
+        self.limit = limit
+        self.size = 0
+        self.written = 0
+        self.ring = 0
+        self.last = b''
+        self.fio = None
+
+
+    def open(self):
+        """
+        Creates (truncates) the output file
+        """
+        self.fio = open(self.path, 'wb')
+
+
+    def write(self, data):
+        """
+        Adds output of the job
+
+        Arguments
+        ---------
+        data: bytes
+            Output
+        """
+        self.size += len(data)
+        self.last = (self.last + data)[-TAIL_SIZE:]
+        if self.limit is None:
+            self.fio.write(data)
+            return
+        if self.written < self.limit // 2:
+            head = data[:self.limit // 2 - self.written]
+            self.fio.write(head)
+            self.written += len(head)
+            data = data[len(head):]
+
+        # the ring region after the head keeps the last tail_size bytes, the output
+        # position self.ring is at offset self.ring % tail_size of the region
+        tail_size = self.limit - self.limit // 2
+        if tail_size == 0 or len(data) == 0:
+            return
+        if len(data) > tail_size:
+            self.ring += len(data) - tail_size
+            data = data[-tail_size:]
+        while len(data) > 0:
+            position = self.ring % tail_size
+            chunk = data[:tail_size - position]
+            self.fio.seek(self.written + position)
+            self.fio.write(chunk)
+            self.ring += len(chunk)
+            data = data[len(chunk):]
+
+
+    async def read(self, stream):
+        """
+        Reads the output from a stream until its end
+
+        Arguments
+        ---------
+        stream: asyncio.StreamReader
+            Output stream of the job
+        """
+        while True:
+            data = await stream.read(CHUNK_SIZE)
+            if not data:
+                break
+            self.write(data)
+
+
+    def close(self):
+        """
+        Closes the output file, the tail of a limited output is put in order after the
+        head with a note on the omitted bytes
+        """
+        if self.fio is None:
+            return
+        self.fio.close()
+        self.fio = None
+        tail_size = 0 if self.limit is None else self.limit - self.limit // 2
+        if self.ring <= tail_size:
+            return
+        position = self.ring % tail_size
+        with open(self.path, 'rb') as fin, open(self.path + '.tmp', 'wb') as fout:
+            _copy(fin, fout, self.written)
+            fout.write(b'\n[... %d bytes omitted ...]\n' % (self.ring - tail_size))
+            fin.seek(self.written + position)
+            _copy(fin, fout, tail_size - position)
+            fin.seek(self.written)
+            _copy(fin, fout, position)
+        os.replace(self.path + '.tmp', self.path)
+
+
+    def text(self):
+        """
+        Returns the tail of the output
+        """
+        return self.last.decode("utf-8", errors="replace")
+
+
+    @staticmethod
+    def load(path, limit=None):
+        """
+        Returns the tail of an output file written by the job itself. A file larger than
+        the limit is cut down to its head and tail.
+
+        Arguments
+        ---------
+        path: str
+            Path to output file
+        limit: int
+            Max size (bytes) of the output file (default: unlimited)
+        """
+        if not os.path.exists(path):
+            return ''
+        size = os.path.getsize(path)
+        with open(path, 'rb') as fio:
+            fio.seek(max(0, size - TAIL_SIZE))
+            tail = fio.read()
+        if limit is not None and size > limit:
+            with open(path, 'rb') as fio, open(path + '.tmp', 'wb') as out:
+                _copy(fio, out, limit // 2)
+                out.write(b'\n[... %d bytes omitted ...]\n' % (size - limit))
+                fio.seek(size - (limit - limit // 2))
+                _copy(fio, out, limit - limit // 2)
+            os.replace(path + '.tmp', path)
+        return tail.decode("utf-8", errors="replace")
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+""" ProcessMonitor """
+
+import os
+import re
+import asyncio
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+# unit of block I/O counts of the kernel resource usage (bytes)
+BLOCK_SIZE = 512
+
+class ProcessMonitor:
+    """
+    Samples the resource usage of a process and all its descendants from /proc: peak
+    resident set size, cpu time, context switches, storage I/O and number of processes.
+    Samples miss everything after the last sample, final cpu time, context switches and
+    I/O are taken from the kernel when the process has ended (finish) or from a last
+    sample of a process that is still alive (complete). Without these, only the peak
+    resident set size and the number of processes (lower bounds) are reported.
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.peak_rss = 0
+        self.cpu_user = 0
+        self.cpu_system = 0
+        self.io_read = 0
+        self.io_write = 0
+        self.context_switches = dict()
+        self.final_switches = (0, 0)
+        self.processes = set()
+        self.offset = (0, 0, 0, 0, dict())
+        self.exact = False
+
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, 'r') as fio:
+                return fio.read()
+        except (IOError, ProcessLookupError):
+            return ''
+
+
+    def pids(self):
+        """
+        Returns the process ids of the process and all its descendants
+        """
+        pids = [self.pid]
+        i = 0
+        while i < len(pids):
+            children = self._read('/proc/%d/task/%d/children' % (pids[i], pids[i]))
+            pids += [int(pid) for pid in children.split()]
+            i += 1
+        return pids
+
+
+    def _context_switches(self, pid, status):
+        # context switches (voluntary, involuntary) by thread, /proc/<pid>/status only
+        # counts the main thread
+        tids = [pid]
+        if re.search(r'^Threads:\s*1$', status, re.MULTILINE) is None:
+            tids = [int(tid) for tid in self._listdir('/proc/%d/task' % pid)]
+        for tid in tids:
+            if tid != pid:
+                status = self._read('/proc/%d/task/%d/status' % (pid, tid))
+            switches = re.findall(r'^(?:non)?voluntary_ctxt_switches:\s*(\d+)$', status,
+                                  re.MULTILINE)
+            if len(switches) == 2:
+                self.context_switches[(pid, tid)] = (int(switches[0]), int(switches[1]))
+
+
+    @staticmethod
+    def _listdir(path):
+        try:
+            return os.listdir(path)
+        except (IOError, ProcessLookupError):
+            return list()
+
+
+    def sample(self):
+        """
+        Updates the resource usage of the process tree: peak resident set size (bytes),
+        cpu time (seconds), context switches and storage I/O (bytes). Cpu time and I/O of
+        processes include their children that have been waited for, so that processes
+        ending between two samples are accounted for by their parent.
+        """
+        rss = 0
+        usage = [0, 0, 0, 0]
+        for pid in self.pids():
+            statm = self._read('/proc/%d/statm' % pid).split()
+            if len(statm) >= 2:
+                rss += int(statm[1]) * PAGE_SIZE
+            status = self._read('/proc/%d/status' % pid)
+            # peak of a single process, including what happened between samples
+            hwm = re.search(r'^VmHWM:\s*(\d+) kB$', status, re.MULTILINE)
+            if hwm is not None:
+                self.peak_rss = max(self.peak_rss, int(hwm.group(1)) * 1024)
+            # fields after the command name: utime, stime, cutime, cstime at 11 to 14
+            stat = self._read('/proc/%d/stat' % pid)
+            stat = stat[stat.rfind(')') + 1:].split()
+            if len(stat) >= 15:
+                usage[0] += (int(stat[11]) + int(stat[13])) / CLOCK_TICKS
+                usage[1] += (int(stat[12]) + int(stat[14])) / CLOCK_TICKS
+            io = dict(line.split(': ') for line in self._read('/proc/%d/io' % pid).splitlines()
+                      if ': ' in line)
+            usage[2] += int(io.get('read_bytes', 0))
+            usage[3] += int(io.get('write_bytes', 0))
+            self._context_switches(pid, status)
+            self.processes.add(pid)
+        self.peak_rss = max(self.peak_rss, rss)
+
+        # processes that ended are missing in the sum until their parent waited for them
+        self.cpu_user = max(self.cpu_user, usage[0] - self.offset[0])
+        self.cpu_system = max(self.cpu_system, usage[1] - self.offset[1])
+        self.io_read = max(self.io_read, usage[2] - self.offset[2])
+        self.io_write = max(self.io_write, usage[3] - self.offset[3])
+
+
+    def reset(self):
+        """
+        Starts the accounting of resource usage at the current usage of the process
+        tree, for processes that are reused by several jobs. Called before the first
+        sample.
+        """
+        # resets the peak resident set size (VmHWM) of the process
+        try:
+            with open('/proc/%d/clear_refs' % self.pid, 'w') as fio:
+                fio.write('5')
+        except (IOError, ProcessLookupError):
+            pass
+        self.sample()
+        self.offset = (self.cpu_user, self.cpu_system, self.io_read, self.io_write,
+                       dict(self.context_switches))
+        self.peak_rss = 0
+        self.cpu_user = self.cpu_system = self.io_read = self.io_write = 0
+        self.processes = set()
+
+
+    def finish(self, usages):
+        """
+        Completes the resource usage of the ended process by the resource usage the
+        kernel reported when it was reaped. It includes all descendants that were waited
+        for, the peak resident set size is the peak of the largest process.
+
+        Arguments
+        ---------
+        usages: list
+            Resource usages (resource.struct_rusage) of the process (and its children)
+        """
+        self.cpu_user = max(self.cpu_user, sum(usage.ru_utime for usage in usages))
+        self.cpu_system = max(self.cpu_system, sum(usage.ru_stime for usage in usages))
+        self.io_read = max(self.io_read,
+                           sum(usage.ru_inblock for usage in usages) * BLOCK_SIZE)
+        self.io_write = max(self.io_write,
+                            sum(usage.ru_oublock for usage in usages) * BLOCK_SIZE)
+        self.final_switches = (sum(usage.ru_nvcsw for usage in usages),
+                               sum(usage.ru_nivcsw for usage in usages))
+        self.peak_rss = max([self.peak_rss] + [usage.ru_maxrss * 1024 for usage in usages])
+        self.processes.add(self.pid)
+        self.exact = True
+
+
+    def complete(self):
+        """
+        Takes a last sample of a process that is still alive after the job (reused by
+        several jobs), its accumulated cpu time, context switches and I/O are exact
+        """
+        if not os.path.exists('/proc/%d' % self.pid):
+            return
+        self.sample()
+        self.exact = True
+
+
+    def entries(self):
+        """
+        Returns the resource usage as trace entries (MB, seconds). Cpu time, context
+        switches and I/O are missing (None) if they are not exact.
+        """
+        voluntary = involuntary = 0
+        for key, (n_voluntary, n_involuntary) in self.context_switches.items():
+            offset = self.offset[4].get(key, (0, 0))
+            voluntary += n_voluntary - offset[0]
+            involuntary += n_involuntary - offset[1]
+        entries = {
+            'PeakRSS': self.peak_rss / 1024**2,
+            'CPUUser': self.cpu_user,
+            'CPUSystem': self.cpu_system,
+            'ContextSwitchesVoluntary': max(voluntary, self.final_switches[0]),
+            'ContextSwitchesInvoluntary': max(involuntary, self.final_switches[1]),
+            'IORead': self.io_read / 1024**2,
+            'IOWrite': self.io_write / 1024**2,
+            'Processes': len(self.processes)
+        }
+        if not self.exact:
+            for entry in ('CPUUser', 'CPUSystem', 'ContextSwitchesVoluntary',
+                          'ContextSwitchesInvoluntary', 'IORead', 'IOWrite'):
+                entries[entry] = None
+        return entries
+
+
+    async def watch(self, interval):
+        """
+        Samples the process tree every interval seconds until cancelled
+
+        Arguments
+        ---------
+        interval: float
+            Seconds between two samples
+        """
+        while True:
+            self.sample()
+            await asyncio.sleep(interval)
+
+
+    @staticmethod
+    def oom_kills():
+        """
+        Returns the number of processes killed by the OOM killer in the cgroup of this
+        process or None if not available (cgroup v2 only)
+        """
+        for line in ProcessMonitor._read('/proc/self/cgroup').splitlines():
+            if not line.startswith('0::'):
+                continue
+            events = ProcessMonitor._read(os.path.join('/sys/fs/cgroup', line[3:].strip('/'),
+                                                       'memory.events'))
+            for event in events.splitlines():
+                key, value = event.split()
+                if key == 'oom_kill':
+                    return int(value)
+        return None
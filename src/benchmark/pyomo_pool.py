@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+""" PyomoPool """
+
+import os
+import sys
+import time
+import signal
+import asyncio
+import resource
+import importlib
+import multiprocessing
+
+import pyomo.environ as pyo
+
+from process_monitor import ProcessMonitor
+from execution import MONITOR_INTERVAL
+
+def _solve(name, add_options, cpus, workdir, conn):
+    # runs in a child of the fork server, that has already imported pyomo
+    os.setsid()
+    if cpus is not None:
+        os.sched_setaffinity(0, cpus)
+    os.chdir(workdir)
+    sys.path.insert(0, workdir)
+    for fd, filename in ((1, 'stdout.txt'), (2, 'stderr.txt')):
+        file_fd = os.open(os.path.join(workdir, filename), os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                          0o644)
+        os.dup2(file_fd, fd)
+        os.close(file_fd)
+
+    opt = pyo.SolverFactory('gams')
+    opt.options["keepfiles"] = True
+    opt.options["add_options"] = add_options
+
+    # load pyomo problem
+    model = getattr(importlib.import_module(name), "m")
+
+    # solve
+    time_used = time.time()
+    results = opt.solve(model)
+    time_used = time.time() - time_used
+    # the job is not a child of the benchmark, it reports its own resource usage
+    conn.send([results, time_used, [resource.getrusage(resource.RUSAGE_SELF),
+                                    resource.getrusage(resource.RUSAGE_CHILDREN)]])
+
+
+class PyomoPool:
+    """
+    Runs pyomo jobs in processes forked from a server process that imported pyomo
+    only once
+    """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self.context = multiprocessing.get_context('forkserver')
+        self.context.set_forkserver_preload(['pyomo_pool'])
+
+
+    @staticmethod
+    async def _readable(fd):
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        loop.add_reader(fd, lambda: future.done() or future.set_result(None))
+        try:
+            await future
+        finally:
+            loop.remove_reader(fd)
+
+
+    async def _wait(self, receiver, process):
+        # result of the job or None if the job died without sending one
+        await self._readable(receiver.fileno())
+        try:
+            output = receiver.recv()
+        except EOFError:
+            output = None
+        await self._readable(process.sentinel)
+        return output
+
+
+    @staticmethod
+    def _kill(process):
+        # the job leads its own process group, that includes the GAMS processes
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            process.kill()
+
+
+    async def run(self, name, add_options, execution):
+        """
+        Runs a pyomo job in a forked child process and fills the execution. The
+        results of the solve are stored as output of the execution.
+
+        Arguments
+        ---------
+        name: str
+            Name of the pyomo model, the model file is located in the working directory
+        add_options: list
+            GAMS options statements passed to the pyomo GAMS interface
+        execution: Execution
+            Execution of the job, holds working directory, timeout and cpus
+        """
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=_solve, args=(name, add_options, execution.cpus,
+                                                             execution.workdir, sender))
+        oom_kills = ProcessMonitor.oom_kills()
+        execution.start = time.time()
+        process.start()
+        sender.close()
+        execution.monitor = ProcessMonitor(process.pid)
+        sampler = asyncio.ensure_future(execution.monitor.watch(MONITOR_INTERVAL))
+        try:
+            execution.output = await asyncio.wait_for(self._wait(receiver, process),
+                                                      execution.timeout)
+        except asyncio.TimeoutError:
+            await execution.terminate(process.pid, lambda: self._readable(process.sentinel))
+        except asyncio.CancelledError:
+            self._kill(process)
+            raise
+        finally:
+            sampler.cancel()
+            receiver.close()
+        execution.time = time.time() - execution.start
+        if execution.output is not None:
+            execution.monitor.finish(execution.output[2])
+            execution.output = execution.output[:2]
+
+        process.join()
+        execution.kill_leftovers(process.pid)
+        execution.returncode = process.exitcode
+        execution.detect_out_of_memory(oom_kills)
+        execution.load_output()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+""" RepeatSummary """
+
+import statistics
+
+# entries of the summary file of repeated jobs
+REPEAT_ENTRIES = [
+    'InputFileName', 'Repeats', 'Representative', 'SolverTimeMedian', 'SolverTimeMin',
+    'SolverTimeMax', 'SolverTimeQ1', 'SolverTimeQ3', 'SolverTimeIQR', 'ETInterfaceMedian',
+    'Outliers'
+]
+
+# times outside of [Q1 - OUTLIER_FENCE * IQR, Q3 + OUTLIER_FENCE * IQR] are outliers
+OUTLIER_FENCE = 1.5
+
+class RepeatSummary:
+    """
+    Timing statistics of the repeats of a job: median, min, max and interquartile
+    range of the solver time and outliers. The repeat with the median solver time
+    represents the job in the trace file.
+    """
+
+    def __init__(self, name, traces):
+        """
+        Arguments
+        ---------
+        name: str
+            Input file name
+        traces: dict
+            Trace records of the repeats by repeat index
+        """
+        self.name = name
+        self.traces = traces
+        self.record = dict()
+        self._compute()
+
+
+    @staticmethod
+    def header():
+        """
+        Returns the header of the summary file
+        """
+        return ",".join(REPEAT_ENTRIES) + "\n"
+
+
+    @staticmethod
+    def _times(traces, key):
+        times = dict()
+        for repeat, trace in traces.items():
+            if trace.record[key] is not None:
+                times[repeat] = trace.record[key]
+        return times
+
+
+    def _compute(self):
+        times = self._times(self.traces, 'SolverTime')
+        et_times = self._times(self.traces, 'ETInterface')
+        self.record = {key: None for key in REPEAT_ENTRIES}
+        self.record['InputFileName'] = self.name
+        self.record['Repeats'] = len(self.traces)
+        self.record['Representative'] = self.representative()
+        self.record['Outliers'] = ''
+        if len(et_times) > 0:
+            self.record['ETInterfaceMedian'] = statistics.median(et_times.values())
+        if len(times) == 0:
+            return
+
+        values = sorted(times.values())
+        self.record['SolverTimeMedian'] = statistics.median(values)
+        self.record['SolverTimeMin'] = values[0]
+        self.record['SolverTimeMax'] = values[-1]
+        if len(values) < 2:
+            return
+        first, _, third = statistics.quantiles(values, n=4, method='inclusive')
+        iqr = third - first
+        self.record['SolverTimeQ1'] = first
+        self.record['SolverTimeQ3'] = third
+        self.record['SolverTimeIQR'] = iqr
+        outliers = [repeat for repeat, time in sorted(times.items())
+                    if time < first - OUTLIER_FENCE * iqr or time > third + OUTLIER_FENCE * iqr]
+        self.record['Outliers'] = ';'.join(str(repeat) for repeat in outliers)
+
+
+    def representative(self):
+        """
+        Returns the repeat index with the median solver time (the lower one of an even
+        number of repeats), repeats without solver time are the slowest
+        """
+        def _time(repeat):
+            time = self.traces[repeat].record['SolverTime']
+            return (time is None, time or 0, repeat)
+        repeats = sorted(self.traces, key=_time)
+        return repeats[(len(repeats) - 1) // 2]
+
+
+    def trace(self):
+        """
+        Returns the trace record of the representative repeat
+        """
+        return self.traces[self.representative()]
+
+
+    def line(self):
+        """
+        Returns the line of the summary file
+        """
+        values = list()
+        for key in REPEAT_ENTRIES:
+            value = self.record[key]
+            values.append("NA" if value is None else str(value))
+        return ",".join(values) + "\n"
@@ -1,15 +1,21 @@
 #!/usr/bin/env python3
 """ Result """
 
+# solver status: licensing problems, user interrupt, errors (setup, solver, internal,
+# skipped, system failure)
+FAILED_SOLVER_STATUS = range(7, 14)
+
 class Result:
     """
     Holds the result of a benchmark job
     """
+    # pylint: disable=too-many-public-methods
 
     def __init__(self, trace, stdout, stderr):
         self.trace = trace
         self.stdout = stdout
         self.stderr = stderr
+        self.returncode = None
 
 
     def name(self):
@@ -101,3 +107,76 @@ class Result:
         Returns the interface time
         """
         return self.trace.record['ETInterface']
+
+
+    def peak_rss(self):
+        """
+        Returns the peak resident set size (MB) of the job process tree
+        """
+        return self.trace.record['PeakRSS']
+
+
+    def cpu_user(self):
+        """
+        Returns the user cpu time (seconds) of the job process tree
+        """
+        return self.trace.record['CPUUser']
+
+
+    def cpu_system(self):
+        """
+        Returns the system cpu time (seconds) of the job process tree
+        """
+        return self.trace.record['CPUSystem']
+
+
+    def context_switches(self):
+        """
+        Returns the voluntary and involuntary context switches of the job process tree
+        """
+        return (self.trace.record['ContextSwitchesVoluntary'],
+                self.trace.record['ContextSwitchesInvoluntary'])
+
+
+    def io_read(self):
+        """
+        Returns the bytes (MB) read from storage by the job process tree
+        """
+        return self.trace.record['IORead']
+
+
+    def io_write(self):
+        """
+        Returns the bytes (MB) written to storage by the job process tree
+        """
+        return self.trace.record['IOWrite']
+
+
+    def n_processes(self):
+        """
+        Returns the number of processes of the job process tree
+        """
+        return self.trace.record['Processes']
+
+
+    def kill_signal(self):
+        """
+        Returns the last signal sent to the job process group due to a timeout
+        """
+        return self.trace.record['KillSignal']
+
+
+    def out_of_memory(self):
+        """
+        Returns whether the job was killed by the out-of-memory killer
+        """
+        return self.trace.record['OutOfMemory'] == 1
+
+
+    def failed(self):
+        """
+        Returns whether the job failed: it did not exit cleanly or its solver status is a
+        licensing problem, user interrupt or an error (incl. missing trace file)
+        """
+        return (self.returncode != 0 or self.solver_status() is None or
+                self.solver_status() in FAILED_SOLVER_STATUS)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+""" ResultCache """
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import sqlite3
+
+from trace_record import TraceRecord
+
+# bytes of a model file hashed at once
+HASH_CHUNK_SIZE = 1024**2
+
+class ResultCache:
+    """
+    Cache of job results shared by result directories. Results are addressed by a hash
+    of the job inputs: model file content, configuration, interface, GAMS and interface
+    version, max_time and repeat index. An entry holds the trace record and the files
+    the job left in its working directory.
+    """
+
+    def __init__(self, path, max_size=None, max_age=None, bypass=False):
+        """
+        Arguments
+        ---------
+        path: str
+            Cache directory
+        max_size: int
+            Max total size (bytes) of the cached files (default: unlimited)
+        max_age: float
+            Max time (seconds) since an entry was used last (default: unlimited)
+        bypass: bool
+            Results are not taken from the cache, but new results replace its entries
+        """
+        self.path = path
+        self.max_size = max_size
+        self.max_age = max_age
+        self.bypass = bypass
+        self.connection = None
+        self.digests = dict()
+        self.hits = 0
+
+
+    def open(self):
+        """
+        Opens (creates) the cache and evicts old entries
+        """
+        os.makedirs(os.path.join(self.path, 'entries'), exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(self.path, 'cache.db'), timeout=60)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, "
+                                "record TEXT, size INTEGER, created REAL, used REAL)")
+        self.connection.commit()
+        self.evict()
+
+
+    def _digest(self, model_file):
+        # content hash of a model file, each model file is read once
+        if model_file not in self.digests:
+            digest = hashlib.sha256()
+            with open(model_file, 'rb') as fio:
+                for chunk in iter(lambda: fio.read(HASH_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            self.digests[model_file] = digest.hexdigest()
+        return self.digests[model_file]
+
+
+    def key(self, job, runner):
+        """
+        Returns the key of the result of a job
+
+        Arguments
+        ---------
+        job: Job
+            Benchmark job
+        runner: Runner
+            Runner of the job
+        """
+        inputs = [self._digest(job.model_file), job.filename(), job.options(), runner.name,
+                  runner.version_gams, runner.version_interface, job.max_time, job.repeat]
+        return hashlib.sha256(json.dumps(inputs).encode()).hexdigest()
+
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, 'entries', key[:2], key)
+
+
+    def get(self, key, workdir):
+        """
+        Returns the cached trace record of a job and restores its files into the working
+        directory, None if not cached
+
+        Arguments
+        ---------
+        key: str
+            Key of the job
+        workdir: str
+            Working directory of the job
+        """
+        if self.bypass:
+            return None
+        row = self.connection.execute("SELECT record FROM entries WHERE key = ?",
+                                      (key,)).fetchone()
+        entry_path = self._entry_path(key)
+        if row is None or not os.path.isdir(entry_path):
+            return None
+        for name in os.listdir(entry_path):
+            shutil.copyfile(os.path.join(entry_path, name), os.path.join(workdir, name))
+        trace = TraceRecord(None)
+        for entry, value in json.loads(row[0]).items():
+            if entry in trace.record:
+                trace.record[entry] = value
+        trace.write(os.path.join(workdir, 'trace.trc'))
+        self.connection.execute("UPDATE entries SET used = ? WHERE key = ?", (time.time(), key))
+        self.hits += 1
+        return trace
+
+
+    def add(self, key, trace_record, workdir, exclude=()):
+        """
+        Adds (replaces) the result of a job, stored with the next commit
+
+        Arguments
+        ---------
+        key: str
+            Key of the job
+        trace_record: TraceRecord
+            Trace record of the job
+        workdir: str
+            Working directory of the job
+        exclude: list
+            Files of the working directory that are not cached (e.g. model file)
+        """
+        # files are copied to a temporary directory that replaces the entry, readers
+        # never see a partially written entry
+        entry_path = self._entry_path(key)
+        tmp_path = '%s.%d.tmp' % (entry_path, os.getpid())
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+        size = 0
+        for name in os.listdir(workdir):
+            path = os.path.join(workdir, name)
+            if name in exclude or name == 'trace.trc' or not os.path.isfile(path):
+                continue
+            shutil.copyfile(path, os.path.join(tmp_path, name))
+            size += os.path.getsize(path)
+        if os.path.exists(entry_path):
+            shutil.rmtree(entry_path)
+        os.replace(tmp_path, entry_path)
+        record = json.dumps(trace_record.record)
+        now = time.time()
+        self.connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                                (key, record, size + len(record), now, now))
+
+
+    def _remove(self, keys):
+        for key in keys:
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+            self.connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+
+    def evict(self):
+        """
+        Removes entries not used for max_age seconds, then the least recently used
+        entries until the cached files fit into max_size
+        """
+        if self.max_age is not None:
+            self._remove([key for key, in self.connection.execute(
+                "SELECT key FROM entries WHERE used < ?", (time.time() - self.max_age,))])
+        if self.max_size is not None:
+            entries = self.connection.execute(
+                "SELECT key, size FROM entries ORDER BY used DESC").fetchall()
+            total = 0
+            evicted = list()
+            for key, size in entries:
+                total += size
+                if total > self.max_size:
+                    evicted.append(key)
+            self._remove(evicted)
+        self.connection.commit()
+
+
+    def commit(self):
+        """
+        Stores the added entries and usage times
+        """
+        self.connection.commit()
+
+
+    def close(self):
+        """
+        Evicts entries, stores changes and closes the cache
+        """
+        if self.connection is not None:
+            self.evict()
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+""" ResultPack """
+
+import io
+import os
+import zlib
+import sqlite3
+
+class ResultPack:
+    """
+    Archive of the files of finished jobs of a configuration. Files are stored
+    compressed in a single database (indexed by their path relative to the pack
+    directory) instead of one directory per job, and are read without unpacking.
+    """
+
+    def __init__(self, path):
+        """
+        Arguments
+        ---------
+        path: str
+            Path to pack file, files are addressed relative to its directory
+        """
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+        self.connection = None
+
+
+    def open(self):
+        """
+        Opens (creates) the pack
+        """
+        os.makedirs(self.root, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, "
+                                "size INTEGER, data BLOB)")
+        self.connection.commit()
+
+
+    def _name(self, path):
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+
+
+    @staticmethod
+    def read(directory, names):
+        """
+        Returns the compressed content of files as dict of file name to (size, data)
+
+        Arguments
+        ---------
+        directory: str
+            Directory of the files
+        names: list
+            File names
+        """
+        files = dict()
+        for name in names:
+            with open(os.path.join(directory, name), 'rb') as fio:
+                data = fio.read()
+            files[name] = (len(data), zlib.compress(data))
+        return files
+
+
+    def add(self, directory, files):
+        """
+        Adds (replaces) the files of a directory, stored with the next commit. Files
+        stored before for the directory are removed.
+
+        Arguments
+        ---------
+        directory: str
+            Directory of the files (e.g. working directory of a job)
+        files: dict
+            Compressed files as returned by read()
+        """
+        prefix = self._name(directory) + '/'
+        # all names below the directory, '0' follows '/'
+        self.connection.execute("DELETE FROM files WHERE name >= ? AND name < ?",
+                                (prefix, prefix[:-1] + '0'))
+        self.connection.executemany("INSERT INTO files VALUES (?, ?, ?)",
+                                    [(prefix + name, size, data)
+                                     for name, (size, data) in files.items()])
+
+
+    def contains(self, path):
+        """
+        Returns whether a file is stored in the pack
+
+        Arguments
+        ---------
+        path: str
+            Path of the file as if it was unpacked
+        """
+        return self.connection.execute("SELECT 1 FROM files WHERE name = ?",
+                                       (self._name(path),)).fetchone() is not None
+
+
+    def get(self, path):
+        """
+        Returns the content of a file, None if not stored
+
+        Arguments
+        ---------
+        path: str
+            Path of the file as if it was unpacked
+        """
+        row = self.connection.execute("SELECT data FROM files WHERE name = ?",
+                                      (self._name(path),)).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0])
+
+
+    def open_text(self, path):
+        """
+        Returns a text file object of a stored file, None if not stored
+
+        Arguments
+        ---------
+        path: str
+            Path of the file as if it was unpacked
+        """
+        data = self.get(path)
+        if data is None:
+            return None
+        return io.StringIO(data.decode("utf-8", errors="replace"))
+
+
+    def commit(self):
+        """
+        Stores the added files
+        """
+        self.connection.commit()
+
+
+    def close(self):
+        """
+        Stores the added files and closes the pack
+        """
+        if self.connection is not None:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 """ Runner """
 
+import os
+
 from trace_record import TraceRecord
 from result import Result
+from execution import Execution
 
 class Runner:
     """
@@ -14,6 +17,7 @@ class Runner:
         self.version_gams = ''
         self.version_interface = ''
         self.modelfile_ext = ''
+        self.max_output = None
 
 
     def command(self, job):
@@ -29,14 +33,78 @@ class Runner:
         return ['NOT AVAILABLE']
 
 
-    def run(self, job):
+    def execution(self, job, cmd):
         """
-        Runs a GAMS job using the command line. Returns result.
+        Returns the execution of a GAMS job
 
         Arguments
         ---------
         job : Job
             Benchmark job
+        cmd : list
+            Command of the job (None if run by a worker)
+        """
+        return Execution(cmd, job.rundir, job.max_time + job.kill_time, job.cpus,
+                         self.max_output)
+
+
+    def result(self, job, execution):
+        """
+        Processes the finished execution of a GAMS job. Returns result.
+
+        Arguments
+        ---------
+        job : Job
+            Benchmark job
+        execution : Execution
+            Finished execution of the job command
+        """
+        # pylint: disable=no-self-use
+        return Result(TraceRecord(job.filename()), execution.stdout, execution.stderr)
+
+
+    def finish(self, job, execution):
+        """
+        Processes the finished execution of a GAMS job, adds benchmark information
+        and writes the trace file of the job. Returns result.
+
+        Arguments
+        ---------
+        job : Job
+            Benchmark job
+        execution : Execution
+            Finished execution of the job command
+        """
+        result = self.result(job, execution)
+        result.returncode = execution.returncode
+        if job.cpus is not None:
+            result.trace.record['Affinity'] = ' '.join(str(cpu) for cpu in job.cpus)
+        if execution.monitor is not None:
+            result.trace.record.update(execution.monitor.entries())
+        result.trace.record['OutOfMemory'] = int(execution.out_of_memory)
+        result.trace.record['KillSignal'] = execution.kill_signal
+        result.trace.record['KillTime'] = execution.kill_time
+        result.trace.record['ModelLink'] = job.model_link
+        result.trace.write(os.path.join(job.rundir, 'trace.trc'))
+        return result
+
+
+    async def run_async(self, job):
+        """
+        Runs a GAMS job using the command line within the running event loop.
+        Returns result.
+
+        Arguments
+        ---------
+        job : Job
+            Benchmark job
+        """
+        execution = self.execution(job, self.command(job))
+        await execution.run_async()
+        return self.finish(job, execution)
+
+
+    async def stop(self):
+        """
+        Stops processes the runner keeps alive between jobs
         """
-        # pylint: disable=unused-argument,no-self-use
-        return Result(TraceRecord(job.filename()), "", "")
@@ -3,7 +3,6 @@
 
 import os
 import re
-import time
 import subprocess
 
 from runner import Runner
@@ -49,59 +48,40 @@ class RunnerDirect(Runner):
             Benchmark job
         """
 
-        cmd = ['timeout', '%d' % (job.max_time + job.kill_time),
-               os.path.join(self.sysdir, 'gams'),
-               os.path.join(job.workdir, job.name + '.gms'),
+        cmd = [os.path.join(self.sysdir, 'gams'),
+               os.path.join(job.rundir, job.name + '.gms'),
                'lo=2', 'al=0', 'ao=0',
-               'curdir=%s' % job.workdir,
+               'curdir=%s' % job.rundir,
                'trace=trace.trc', 'traceOpt=5',
                'reslim=%d' % job.max_time,
                'solprint=off', 'solvelink=5']
-        for (key, value) in job.configuration:
-            if key == 'id':
-                continue
+        for (key, value) in job.options():
             cmd.append(key + "=" + value)
         return cmd
 
 
-    def run(self, job):
+    def result(self, job, execution):
         """
-        Runs a GAMS job using the command line. Returns result.
+        Processes the finished execution of a GAMS job. Returns result.
 
         Arguments
         ---------
         job : Job
             Benchmark job
+        execution : Execution
+            Finished execution of the job command
         """
 
-        cmd = self.command(job)
-
-        # solve
-        time_interface = time.time()
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                                #    env={'LD_LIBRARY_PATH': self.sysdir})
-        stdout, stderr = process.communicate()
-        time_interface = time.time() - time_interface
-        stdout = stdout.decode("utf-8")
-        stderr = stderr.decode("utf-8")
-
-        # store stdout / stderr
-        with open(os.path.join(job.workdir, 'stdout.txt'), 'w') as fio:
-            fio.write(stdout)
-        with open(os.path.join(job.workdir, 'stderr.txt'), 'w') as fio:
-            fio.write(stderr)
-
         # process solution
         trc = TraceRecord(job.filename())
         try:
-            trc.load_trc(os.path.join(job.workdir, "trace.trc"))
+            trc.load_trc(os.path.join(job.rundir, "trace.trc"))
         except FileNotFoundError:
             trc.record['SolverStatus'] = 13
             trc.record['ModelStatus'] = 12
 
-        trc.record['ETInterface'] = time_interface
+        trc.record['ETInterface'] = execution.time
         if trc.record['SolverTime'] is not None:
             trc.record['ETInterfaceOverhead'] = trc.record['ETInterface'] - trc.record['SolverTime']
-        trc.write(os.path.join(job.workdir, "trace.trc"))
 
-        return Result(trc, stdout, stderr)
+        return Result(trc, execution.stdout, execution.stderr)
@@ -4,10 +4,11 @@
 import os
 import re
 import subprocess
-from multiprocessing import Process
 
 from runner import Runner
 from runner_direct import RunnerDirect
+from julia_pool import JuliaPool
+from julia_sysimage import JuliaSysimage
 from trace_record import TraceRecord
 from result import Result
 
@@ -15,63 +16,72 @@ class RunnerJump(Runner):
     """
     Running a GAMS job through JuMP
     """
-    # pylint: disable=too-few-public-methods
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
 
-    def __init__(self, sysdir, use_pyjulia=False):
+    def __init__(self, sysdir, workers=False):
         Runner.__init__(self)
         self.name = 'jump'
         self.modelfile_ext = 'jl'
         self.sysdir = sysdir
+        self.version_julia = ''
+        self.version_gamsjl = ''
         self._get_version()
-        self.use_pyjulia = use_pyjulia
-        if self.use_pyjulia:
-            self._init_julia()
+        self.sysimage = None
+        self.pool = None
+        if workers:
+            self.pool = JuliaPool(sysdir)
 
 
     def _get_version(self):
-        cmd = ['julia', '-e', 'using Pkg; Pkg.status("JuMP")']
+        cmd = ['julia', '-e', 'using Pkg; println("Julia v", VERSION); Pkg.status("JuMP"); '
+                              'Pkg.status("GAMS")']
         process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         stdout, _ = process.communicate()
         stdout = stdout.decode("utf-8")
-        version = re.findall("[0-9]+.[ 0-9]+.[ 0-9]+", stdout)
-        if len(version) >= 1:
-            self.version_interface = version[0]
+        for package, attr in (('Julia', 'version_julia'), ('JuMP', 'version_interface'),
+                              ('GAMS', 'version_gamsjl')):
+            version = re.findall(r"\b%s v([0-9]+\.[0-9]+\.[0-9]+)" % package, stdout)
+            if len(version) >= 1:
+                setattr(self, attr, version[0])
         self.version_gams = RunnerDirect.get_version(self.sysdir)
 
 
-    @staticmethod
-    def _init_julia():
-        # pylint: disable=import-outside-toplevel,no-name-in-module
-        print('Init Julia Environment. This can take some time...')
-        print('Julia...', end='', flush=True)
-        from julia import Julia
-        Julia(compiled_modules=False)
-        from julia import Main
-        print('ok! JuMP...', end='', flush=True)
-        Main.using('JuMP')
-        print('ok! GAMS...', end='', flush=True)
-        Main.using('GAMS')
-        print('ok!')
-
-
-    @staticmethod
-    def _run_julia(jlprog):
-        # pylint: disable=import-outside-toplevel,no-name-in-module
-        from julia import Main, JuliaError
-        try:
-            Main.eval(jlprog)
-        except JuliaError:
-            pass
+    def build_sysimage(self, model_path):
+        """
+        Builds (or loads from cache) a julia system image with JuMP and GAMS.jl
+        compiled in, which is then used by all julia processes
+
+        Arguments
+        ---------
+        model_path: str
+            Directory of julia models used as precompile workload
+        """
+        sysimage = JuliaSysimage(self.sysdir, self.version_julia, self.version_interface,
+                                 self.version_gamsjl)
+        self.sysimage = sysimage.build(model_path)
+        if self.pool is not None:
+            self.pool.sysimage = self.sysimage
+
+
+    def _julia(self):
+        if self.sysimage is None:
+            return ['julia']
+        return ['julia', '--sysimage', self.sysimage]
 
 
     def _program(self, job):
         # gams options
         jlconf = ""
-        for (key, value) in job.configuration:
-            if key == 'id':
-                continue
+        for (key, value) in job.options():
             jlconf += 'set_optimizer_attribute(m, "%s", "%s")\n' % (key, value)
 
+        # warm-up solve, julia compiles JuMP and GAMS before the time is measured
+        # (not needed for workers or a system image, which have compiled them already)
+        jlwarmup = ""
+        if self.pool is None and self.sysimage is None:
+            jlwarmup = "set_optimizer_attribute(m, MOI.TimeLimitSec(), 1)\n"
+            jlwarmup += "JuMP.optimize!(m)\n"
+
         # julia program
         jlprog = """
 using JuMP
@@ -84,9 +94,7 @@ set_optimizer_attribute(m, GAMS.SysDir(), "%s")
 set_optimizer_attribute(m, GAMS.WorkDir(), "%s")
 set_optimizer_attribute(m, MOI.Silent(), true)
 %s
-set_optimizer_attribute(m, MOI.TimeLimitSec(), 1)
-JuMP.optimize!(m)
-
+%s
 set_optimizer_attribute(m, GAMS.Trace(), "trace.trc")
 set_optimizer_attribute(m, GAMS.TraceOpt(), 5)
 set_optimizer_attribute(m, MOI.TimeLimitSec(), %d)
@@ -95,60 +103,78 @@ time_used = @elapsed JuMP.optimize!(m)
 open(joinpath("%s", "jump_results.txt"), "w") do io
     write(io, "time_used " * string(time_used) * "\n")
 end
-        """ % (job.workdir, job.name, self.sysdir, job.workdir, jlconf,
-               job.max_time, job.workdir)
+        """ % (job.rundir, job.name, self.sysdir, job.rundir, jlconf, jlwarmup,
+               job.max_time, job.rundir)
 
         prog = 'jump_' + job.name + '.jl'
-        with open(os.path.join(job.workdir, prog), 'w') as fio:
+        with open(os.path.join(job.rundir, prog), 'w') as fio:
             fio.write(jlprog)
         return prog, jlprog
 
 
-    def run(self, job):
+    def command(self, job):
         """
-        Runs a GAMS job using the command line. Returns result.
+        Writes the julia program of a GAMS job and returns the command to run it
 
         Arguments
         ---------
         job : Job
             Benchmark job
         """
-        # pylint: disable=too-many-locals
-
-        # solve
-        prog, jlprog = self._program(job)
-        if self.use_pyjulia:
-            process = Process(target=self._run_julia(jlprog))
-            process.start()
-            process.join(timeout=job.max_time + job.kill_time)
-            process.terminate()
-            stdout = ""
-            stderr = ""
-        else:
-            progpath = os.path.join(job.workdir, prog)
-            cmd = ['timeout', '%d' % (job.max_time + job.kill_time), 'julia', progpath]
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            stdout, stderr = process.communicate()
-            stdout = stdout.decode("utf-8")
-            stderr = stderr.decode("utf-8")
-
-        # store stdout / stderr
-        with open(os.path.join(job.workdir, 'stdout.txt'), 'w') as fio:
-            fio.write(stdout)
-        with open(os.path.join(job.workdir, 'stderr.txt'), 'w') as fio:
-            fio.write(stderr)
+        prog, _ = self._program(job)
+        return self._julia() + [os.path.join(job.rundir, prog)]
+
+
+    async def run_async(self, job):
+        """
+        Runs a GAMS job using the command line within the running event loop.
+        Returns result.
+
+        Arguments
+        ---------
+        job : Job
+            Benchmark job
+        """
+        if self.pool is None:
+            return await Runner.run_async(self, job)
+
+        prog, _ = self._program(job)
+        execution = self.execution(job, None)
+        await self.pool.run(os.path.join(job.rundir, prog), execution)
+        return self.finish(job, execution)
+
+
+    async def stop(self):
+        """
+        Stops the julia workers
+        """
+        if self.pool is not None:
+            await self.pool.stop()
+
+
+    def result(self, job, execution):
+        """
+        Processes the finished execution of a GAMS job. Returns result.
+
+        Arguments
+        ---------
+        job : Job
+            Benchmark job
+        execution : Execution
+            Finished execution of the job command
+        """
 
         # process solution
         trc = TraceRecord(job.filename())
         try:
-            trc.load_trc(os.path.join(job.workdir, "trace.trc"))
+            trc.load_trc(os.path.join(job.rundir, "trace.trc"))
             trc.record['InputFileName'] = job.filename()
         except FileNotFoundError:
             trc.record['SolverStatus'] = 13
             trc.record['ModelStatus'] = 12
 
         # process solution (jump result file)
-        result_file = os.path.join(job.workdir, 'jump_results.txt')
+        result_file = os.path.join(job.rundir, 'jump_results.txt')
         if os.path.exists(result_file):
             with open(result_file, 'r') as fio:
                 lines = fio.readlines()
@@ -161,7 +187,4 @@ end
         if trc.record['SolverTime'] is not None and trc.record['ETInterface'] is not None:
             trc.record['ETInterfaceOverhead'] = trc.record['ETInterface'] - trc.record['SolverTime']
 
-        # write trace file
-        trc.write(os.path.join(job.workdir, 'trace.trc'))
-
-        return Result(trc, stdout, stderr)
+        return Result(trc, execution.stdout, execution.stderr)
@@ -4,13 +4,13 @@
 import os
 import shutil
 import re
-import subprocess
 import pickle
 
 import pyomo.environ as pyo
 import pyomo.version as pyover
 
 from runner import Runner
+from pyomo_pool import PyomoPool
 from trace_record import TraceRecord
 from result import Result
 
@@ -20,43 +20,47 @@ class RunnerPyomo(Runner):
     """
     # pylint: disable=too-few-public-methods
 
-    def __init__(self):
+    def __init__(self, workers=False):
         Runner.__init__(self)
         self.name = 'pyomo'
         self.modelfile_ext = 'py'
+        self.pool = PyomoPool() if workers else None
         self._get_version()
 
 
     def _get_version(self):
-        # dummy problem
-        model = pyo.ConcreteModel()
-        model.x = pyo.Var(within=pyo.Reals, bounds=(0, 1))
-        model.obj = pyo.Objective(expr=model.x, sense=pyo.minimize)
-        opt = pyo.SolverFactory('gams')
-        results = opt.solve(model)
-        version = re.findall("[0-9]+,[ 0-9]+,[ 0-9]+,[ 0-9]+", results.solver.name)
-        if not version:
-            raise Exception("Can't find GAMS version within pyomo")
-        version = version[0].split(', ')[0:3]
+        # version reported by the gams executable, solves a dummy problem only if not
+        # supported by pyomo
+        version = pyo.SolverFactory('gams').version()
+        if version is None:
+            model = pyo.ConcreteModel()
+            model.x = pyo.Var(within=pyo.Reals, bounds=(0, 1))
+            model.obj = pyo.Objective(expr=model.x, sense=pyo.minimize)
+            results = pyo.SolverFactory('gams').solve(model)
+            version = re.findall("[0-9]+,[ 0-9]+,[ 0-9]+,[ 0-9]+", results.solver.name)
+            if not version:
+                raise Exception("Can't find GAMS version within pyomo")
+            version = version[0].split(', ')[0:3]
 
         # versions
         self.version_interface = "%d.%d.%d" % (pyover.version_info[0:3])
-        self.version_gams = "%s.%s.%s" % (version[0], version[1], version[2])
+        self.version_gams = "%s.%s.%s" % tuple(version[0:3])
 
 
-    def _program(self, job):
-        # pylint: disable=no-self-use
-
+    @staticmethod
+    def _add_options(job):
         # gams options
-        pyconf = 'opt.options["add_options"] = []\n'
-        for (key, value) in job.configuration:
-            if key == 'id':
-                continue
+        add_options = list()
+        for (key, value) in job.options():
             if key.lower() == 'nodlim':
-                pyconf += 'opt.options["add_options"].append("GAMS_MODEL.%s=%s;")\n' % (key, value)
+                add_options.append("GAMS_MODEL.%s=%s;" % (key, value))
             else:
-                pyconf += 'opt.options["add_options"].append("option %s=%s;")\n' % (key, value)
+                add_options.append("option %s=%s;" % (key, value))
+        add_options.append("option reslim=%d;" % job.max_time)
+        return add_options
+
 
+    def _program(self, job):
         # pyomo program
         pyprog = """
 import os
@@ -67,8 +71,7 @@ from pyomo.opt import SolverFactory
 
 opt = pyo.SolverFactory('gams')
 opt.options["keepfiles"] = True
-%s
-opt.options["add_options"].append("option reslim=%d;")
+opt.options["add_options"] = %r
 
 # load pyomo problem
 m = getattr(__import__('%s', fromlist=["m"]), "m")
@@ -81,44 +84,64 @@ time_used = time.time() - time_used
 # store
 with open(os.path.join('%s', 'pyomo_result.pkl'), 'wb') as f:
     pickle.dump([results, time_used], f)
-        """ % (pyconf, job.max_time, job.name, job.workdir)
+        """ % (self._add_options(job), job.name, job.rundir)
 
         prog = 'pyomo_' + job.name + '.py'
-        with open(os.path.join(job.workdir, prog), 'w') as fio:
+        with open(os.path.join(job.rundir, prog), 'w') as fio:
             fio.write(pyprog)
         return prog, pyprog
 
 
-    def run(self, job):
+    def command(self, job):
         """
-        Runs a GAMS job using the command line. Returns result.
+        Writes the pyomo program of a GAMS job and returns the command to run it
 
         Arguments
         ---------
         job : Job
             Benchmark job
         """
-
-        # solve
         prog, _ = self._program(job)
-        progpath = os.path.join(job.workdir, prog)
-        cmd = ['timeout', '%d' % (job.max_time + job.kill_time), 'python', progpath]
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        stdout, stderr = process.communicate()
-        stdout = stdout.decode("utf-8")
-        stderr = stderr.decode("utf-8")
-
-        # store stdout / stderr
-        with open(os.path.join(job.workdir, 'stdout.txt'), 'w') as fio:
-            fio.write(stdout)
-        with open(os.path.join(job.workdir, 'stderr.txt'), 'w') as fio:
-            fio.write(stderr)
+        return ['python', os.path.join(job.rundir, prog)]
+
+
+    async def run_async(self, job):
+        """
+        Runs a GAMS job within the running event loop, in a process forked from the
+        worker pool if enabled. Returns result.
+
+        Arguments
+        ---------
+        job : Job
+            Benchmark job
+        """
+        if self.pool is None:
+            return await Runner.run_async(self, job)
+        execution = self.execution(job, None)
+        await self.pool.run(job.name, self._add_options(job), execution)
+        return self.finish(job, execution)
+
+
+    def result(self, job, execution):
+        """
+        Processes the finished execution of a GAMS job. Returns result.
+
+        Arguments
+        ---------
+        job : Job
+            Benchmark job
+        execution : Execution
+            Finished execution of the job command
+        """
 
         # process solution
         trc = TraceRecord(job.filename())
         try:
-            with open(os.path.join(job.workdir, 'pyomo_result.pkl'), 'rb') as fio:
-                results, trc.record['ETInterface'] = pickle.load(fio)
+            # results are sent over a pipe by pool workers
+            if execution.output is None:
+                with open(os.path.join(job.rundir, 'pyomo_result.pkl'), 'rb') as fio:
+                    execution.output = pickle.load(fio)
+            results, trc.record['ETInterface'] = execution.output
 
             stats = results.problem
             tmpdir = os.path.dirname(stats.name)
@@ -151,7 +174,4 @@ with open(os.path.join('%s', 'pyomo_result.pkl'), 'wb') as f:
         if trc.record['SolverTime'] is not None and trc.record['ETInterface'] is not None:
             trc.record['ETInterfaceOverhead'] = trc.record['ETInterface'] - trc.record['SolverTime']
 
-        # write trace file
-        trc.write(os.path.join(job.workdir, 'trace.trc'))
-
-        return Result(trc, stdout, stderr)
+        return Result(trc, execution.stdout, execution.stderr)
@@ -4,27 +4,58 @@
 import os
 import glob
 import time
-import queue
-import threading
+import random
+import shutil
+import signal
+import asyncio
+import itertools
+import collections
 
 from job import Job
 from trace_dict import TraceDict
+from trace_writer import TraceWriter
+from manifest import Manifest
+from repeat_summary import RepeatSummary
 from trace_record import TraceRecord
 from result import Result
+from result_pack import ResultPack
+
+# files of a job run in a scratch directory that are kept in the result directory
+SCRATCH_ARTIFACTS = ['trace.trc', 'stdout.txt', 'stderr.txt']
 
 class Scheduler:
     """
     Creates benchmark jobs and runs jobs (in parallel)
     """
+    # pylint: disable=too-many-instance-attributes
 
-    def __init__(self, runner, result_path, configurations, output):
+    def __init__(self, runner, result_path, configurations, output, cost_model=None,
+                 topology=None, cache=None):
+        # pylint: disable=too-many-arguments
         self.runner = runner
         self.result_path = result_path
         self.configurations = configurations
         self.time_start = time.time()
-        self.jobs = queue.Queue()
-        self.results = queue.Queue()
+        self.jobs = collections.deque()
+        self.writers = dict()
+        self.summary_writers = dict()
+        self.manifest = None
+        self.repeat = 1
+        self.repeats = dict()
         self.output = output
+        self.cost_model = cost_model
+        self.topology = topology
+        self.cache = cache
+        self.scratch = None
+        self.artifacts = list(SCRATCH_ARTIFACTS)
+        self.persisting = list()
+        self.packs = None
+        self.prefetch = 0
+        self.prefetched = dict()
+        self.prefetch_hits = 0
+        self.prefetch_misses = 0
+        self.skipped = list()
+        self.interrupted = False
 
 
     def _model_files(self, model_path):
@@ -46,10 +77,11 @@ class Scheduler:
         """
         Returns the number of jobs currently in the job pool
         """
-        return self.jobs.qsize()
+        return len(self.jobs)
 
 
-    def create(self, model_path, max_jobs=10000000, max_time=60, kill_time=30, solu_file=None):
+    def create(self, model_path, max_jobs=10000000, max_time=60, kill_time=30, solu_file=None,
+               repeat=1):
         """
         Creates benchmark jobs
 
@@ -63,8 +95,13 @@ class Scheduler:
             Max allowed time per job
         kill_time: int
             Time (+max_time) after which a process should be killed
+        solu_file: str
+            Solution file with known objective values
+        repeat: int
+            Number of runs of each job, in working directories repeat<k> of the job
         """
-        # pylint: disable=too-many-arguments
+        # pylint: disable=too-many-arguments,too-many-locals
+        self.repeat = repeat
 
         # load solution file
         optsol = None
@@ -80,77 +117,519 @@ class Scheduler:
                     return
                 modelname = os.path.splitext(os.path.basename(model))[0]
                 workdir = os.path.join(self.result_path, conf_name, modelname)
-                job = Job(modelname, workdir, model, conf, max_time, kill_time)
-                if optsol is not None and modelname in optsol.records:
-                    record = optsol.records[modelname].record
-                    job.model_status = record['ModelStatus']
-                    job.objective = record['ObjectiveValue']
-                    job.objective_estimate = record['ObjectiveValueEstimate']
-                self.jobs.put(job)
+                for k in range(repeat):
+                    if repeat == 1:
+                        job = Job(modelname, workdir, model, conf, max_time, kill_time)
+                    else:
+                        job = Job(modelname, os.path.join(workdir, 'repeat%d' % (k + 1)), model,
+                                  conf, max_time, kill_time)
+                        job.repeat = k + 1
+                    if optsol is not None and modelname in optsol:
+                        record = optsol.get(modelname).record
+                        job.model_status = record['ModelStatus']
+                        job.objective = record['ObjectiveValue']
+                        job.objective_estimate = record['ObjectiveValueEstimate']
+                    self.jobs.append(job)
+
+
+    def sort(self):
+        """
+        Sorts the jobs by their estimated cost, most expensive jobs first. Jobs with
+        unknown cost are treated as most expensive. Requires a cost model.
+        """
+        if self.cost_model is None:
+            return
+
+        def _cost(job):
+            cost = self.cost_model.cost(job.name, self._configuration_name(job.configuration))
+            if cost is None:
+                return (0, 0)
+            return (1, -cost)
+
+        self.jobs = collections.deque(sorted(self.jobs, key=_cost))
+
+
+    def interleave(self):
+        """
+        Interleaves the configurations: jobs are grouped by model, so that all
+        configurations of a model are run one after another. Models keep the order
+        of their first job.
+        """
+        models = collections.OrderedDict()
+        for job in self.jobs:
+            models.setdefault(job.name, list()).append(job)
+        self.jobs = collections.deque(job for jobs in models.values() for job in jobs)
+
+
+    def shuffle(self, seed=None, keep_order=False):
+        """
+        Distributes the repeats of the jobs to rounds, so that the repeats of a job run
+        at different times and conditions (load, temperature, caches) of the machine:
+        all first repeats, then all second repeats, and so on. Within a round the jobs
+        keep their order (e.g. by cost, interleaved) or are shuffled.
+
+        Arguments
+        ---------
+        seed: int
+            Seed of the random order
+        keep_order: bool
+            Jobs keep their order within a round instead of being shuffled
+        """
+        rounds = collections.OrderedDict()
+        for job in self.jobs:
+            rounds.setdefault(job.repeat, list()).append(job)
+        generator = random.Random(seed)
+        jobs = list()
+        for repeat in sorted(rounds, key=lambda repeat: repeat or 0):
+            if not keep_order:
+                generator.shuffle(rounds[repeat])
+            jobs += rounds[repeat]
+        self.jobs = collections.deque(jobs)
+
 
+    def use_scratch(self, path, artifacts=()):
+        """
+        Runs the jobs in directories below a scratch directory (e.g. a RAM disk on
+        /dev/shm), the artifacts of finished jobs are copied into the result directory in
+        the background
 
-    def run(self, n_threads=1, max_duration=10000000):
+        Arguments
+        ---------
+        path: str
+            Scratch directory
+        artifacts: list
+            File name patterns of files kept in addition to trace file, stdout and stderr
+        """
+        self.scratch = os.path.join(os.path.abspath(path), 'gams-benchmark-%d' % os.getpid())
+        self.artifacts = SCRATCH_ARTIFACTS + list(artifacts)
+
+
+    def use_packs(self):
+        """
+        Stores the files of finished jobs in a result pack per configuration
+        (<configuration>/pack.db) instead of their working directories
+        """
+        self.packs = dict()
+
+
+    def use_prefetch(self, depth):
+        """
+        Prepares the next jobs of the queue while jobs are running: their model files
+        are read into the page cache and their working directories are created
+
+        Arguments
+        ---------
+        depth: int
+            Number of queued jobs prepared ahead
+        """
+        self.prefetch = depth
+
+
+    @staticmethod
+    def _clean_scratch(path):
+        # removes scratch directories left by benchmark processes that no longer exist
+        for stale in glob.glob(os.path.join(path, 'gams-benchmark-*')):
+            try:
+                os.kill(int(stale.rsplit('-', 1)[1]), 0)
+            except ValueError:
+                continue
+            except ProcessLookupError:
+                shutil.rmtree(stale, ignore_errors=True)
+            except PermissionError:
+                continue
+
+
+    def run(self, n_threads=1, max_duration=10000000, memory_budget=None):
         """
         Starts the benchmark
 
         Arguments
         ---------
         n_threads: int
-            Number of threads to run jobs in parallel
+            Number of cores used to run jobs in parallel. A job uses as many cores as
+            its weight (configuration option threads or weight)
         max_duration: int
             Max allowed total duration of benchmark
+        memory_budget: int
+            Max estimated total memory (MB) of jobs running in parallel
         """
 
-        for i in range(n_threads):
-            self.jobs.put(None)
+        # finished jobs are recorded in the manifest, trace files are written while jobs
+        # finish
+        self.manifest = Manifest(os.path.join(self.result_path, 'manifest.db'))
+        self.manifest.open()
+        records = self.manifest.records()
+        self.writers = dict()
+        for conf in self.configurations:
+            conf_name = self._configuration_name(conf)
+            traces, summaries = self._finished_records(records.get(conf_name, dict()))
+            self.writers[conf_name] = TraceWriter(os.path.join(self.result_path, conf_name,
+                                                               'trace.trc'))
+            self.writers[conf_name].open(traces)
+            if self.repeat > 1:
+                self.summary_writers[conf_name] = TraceWriter(
+                    os.path.join(self.result_path, conf_name, 'repeats.csv'),
+                    RepeatSummary.header())
+                self.summary_writers[conf_name].open(summaries)
+        self.repeats = dict()
+        self._open_storage()
 
         # run jobs
-        if n_threads == 1:
-            self._run_thread(0, max_duration)
-        else:
-            threads = []
-            for i in range(n_threads):
-                threads.append(threading.Thread(target=self._run_thread, args=(i, max_duration)))
-                threads[-1].start()
+        self.skipped = list()
+        self.interrupted = False
+        self.prefetched = dict()
+        self.prefetch_hits = 0
+        self.prefetch_misses = 0
+        try:
+            asyncio.run(self._run((n_threads, memory_budget), max_duration))
+        except KeyboardInterrupt:
+            # second Ctrl-C: the running jobs were cancelled (killed) by asyncio.run
+            self.interrupted = True
+        finally:
+            for writer in list(self.writers.values()) + list(self.summary_writers.values()):
+                writer.close()
+            self.manifest.close()
+            self._close_storage()
+        if len(self.skipped) > 0:
+            print("%d jobs not run: predicted time exceeds remaining total time" %
+                  len(self.skipped))
+        if self.cache is not None and self.cache.hits > 0:
+            print("%d jobs taken from cache" % self.cache.hits)
+        if self.interrupted and len(self.jobs) > 0:
+            print("%d jobs not run: interrupted" % len(self.jobs))
+        if self.prefetch > 0:
+            print("Prefetch: %d hits, %d misses" %
+                  (self.prefetch_hits, self.prefetch_misses))
 
-            for i in range(n_threads):
-                threads[i].join()
 
-        # get results and put them in trace files per configuration
-        self.results.put(None)
-        traces = dict()
-        for conf in self.configurations:
-            traces[self._configuration_name(conf)] = TraceDict()
-        while True:
-            result = self.results.get()
-            if result is None:
-                break
-            traces[result[1]].append(result[2])
+    def _finished_records(self, records):
+        # trace records and repeat summaries of the finished jobs of a configuration in
+        # the manifest (by job key), trace files written with another trace record
+        # definition are rebuilt from them
+        if self.repeat == 1:
+            return [trace for key, trace in records.items() if '/' not in key], list()
+        repeats = dict()
+        for key, trace in records.items():
+            name, separator, repeat = key.rpartition('/repeat')
+            if separator != '' and int(repeat) <= self.repeat:
+                repeats.setdefault(name, dict())[int(repeat)] = trace
+        summaries = [RepeatSummary(name, traces) for name, traces in repeats.items()
+                     if len(traces) == self.repeat]
+        return [summary.trace() for summary in summaries], summaries
+
 
-        # write trace files
-        for conf_name, conf_traces in traces.items():
-            conf_traces.write(os.path.join(self.result_path, conf_name, 'trace.trc'))
+    def _open_storage(self):
+        # result cache, result packs and scratch directories of the jobs
+        if self.cache is not None:
+            self.cache.open()
+        if self.packs is not None:
+            for conf in self.configurations:
+                conf_name = self._configuration_name(conf)
+                self.packs[conf_name] = ResultPack(os.path.join(self.result_path, conf_name,
+                                                                'pack.db'))
+                self.packs[conf_name].open()
+            for job in self.jobs:
+                job.pack = self.packs[self._configuration_name(job.configuration)]
+        if self.scratch is not None:
+            self._clean_scratch(os.path.dirname(self.scratch))
+            for job in self.jobs:
+                job.rundir = os.path.join(self.scratch,
+                                          os.path.relpath(job.workdir, self.result_path))
+
+
+    def _close_storage(self):
+        if self.cache is not None:
+            self.cache.close()
+        for pack in (self.packs or dict()).values():
+            pack.close()
+        # scratch space is freed also if jobs were killed
+        if self.scratch is not None:
+            shutil.rmtree(self.scratch, ignore_errors=True)
 
 
     def _duration(self):
         return time.time() - self.time_start
 
 
-    def _run_thread(self, thread_id, max_duration):
-        while True:
-            job = self.jobs.get()
-            if job is None:
-                break
+    def _interrupt(self):
+        # first Ctrl-C: no new jobs are started, running jobs are finished. A second
+        # Ctrl-C raises KeyboardInterrupt, which cancels (kills) the running jobs.
+        self.interrupted = True
+        asyncio.get_event_loop().remove_signal_handler(signal.SIGINT)
+        print("Interrupted: waiting for running jobs to finish, press Ctrl-C again to kill them")
 
-            conf_name = self._configuration_name(job.configuration)
 
-            if job.init_workdir() and self._duration() <= max_duration:
-                result = self.runner.run(job)
-                self.results.put((job.name, conf_name, result.trace))
-            else:
+    def _resume(self, slot):
+        # collect jobs finished in a previous run from the manifest. Jobs not recorded
+        # in the manifest are probed for trace files: their files may have been stored
+        # before the benchmark was interrupted (or by an older benchmark version without
+        # manifest). Then jobs whose result is cached.
+        records = self.manifest.records()
+        jobs = collections.deque()
+        for job in self.jobs:
+            trace = records.get(self._configuration_name(job.configuration), dict()).get(
+                job.key())
+            if trace is not None:
+                self._collect(job, Result(trace, "", ""), slot, store=False)
+            elif job.is_finished():
                 trace = TraceRecord(job.filename())
-                trace.load_trc(os.path.join(job.workdir, 'trace.trc'))
-                result = Result(trace, "", "")
-                self.results.put((job.name, conf_name, trace))
+                trace.load_trc(job.trace_file())
+                self._collect(job, Result(trace, "", ""), slot)
+            elif not self._cached(job, slot):
+                jobs.append(job)
+        self.jobs = jobs
+        self._commit()
+
+
+    async def _run(self, capacity, max_duration):
+        slots = list(range(capacity[0]))
+        asyncio.get_event_loop().add_signal_handler(signal.SIGINT, self._interrupt)
+
+        self._resume(slots[0])
+        try:
+            await self._schedule(capacity, max_duration, slots)
+            await self.runner.stop()
+        finally:
+            # files of finished jobs are stored also if running jobs are cancelled
+            if len(self.persisting) > 0:
+                await asyncio.wait(self.persisting)
+        for future in self.persisting:
+            future.result()
+        self.persisting = list()
+
+
+    async def _schedule(self, capacity, max_duration, slots):
+        running = dict()
+        while (len(self.jobs) > 0 and not self.interrupted) or len(running) > 0:
+            # start jobs while their demand fits into the free cores and memory
+            while len(slots) > 0 and not self.interrupted:
+                job = self._next_job(capacity, running)
+                if job is None:
+                    break
+                if not self._fits(job, max_duration):
+                    self._skip(job, slots[0])
+                    continue
+                demand = self._demand(job, capacity)
+                await self._prepare(job)
+                if self.topology is not None:
+                    job.cpus = self.topology.allocate(demand[0])
+                task = asyncio.ensure_future(self.runner.run_async(job))
+                running[task] = (job, slots.pop(0), self._duration() + self._runtime(job),
+                                 demand)
+            self._prefetch()
+
+            if len(running) == 0:
+                continue
+
+            # collect finished jobs
+            done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                job, slot, _, _ = running.pop(task)
+                if job.cpus is not None:
+                    self.topology.release(job.cpus)
+                self._collect(job, task.result(), slot, store=False)
+                self._cache(job, task.result())
+                self._persist(job, task.result().trace)
+                slots.append(slot)
+            slots.sort()
+            self._commit()
+
+
+    def _persist(self, job, trace):
+        # copies the artifacts of a job run in a scratch directory into the result
+        # directory or stores them in the result pack (files are read and compressed by
+        # a worker thread, the pack is written by the event loop), in the background so
+        # that the next job can be started. The job is recorded as finished in the
+        # manifest only once its files are stored, else it is run again on resume.
+        self.persisting = [future for future in self.persisting if not future.done()]
+        loop = asyncio.get_event_loop()
+        if self.packs is not None:
+            patterns = None if self.scratch is None else self.artifacts
+            future = loop.run_in_executor(None, ResultPack.read, job.rundir,
+                                          job.artifacts(patterns))
+        elif job.rundir != job.workdir:
+            future = loop.run_in_executor(None, job.persist, self.artifacts)
+        else:
+            self._store(job, trace)
+            return
+
+        def _stored(future):
+            if future.cancelled() or future.exception() is not None:
+                return
+            if self.packs is not None:
+                pack = self.packs[self._configuration_name(job.configuration)]
+                pack.add(job.workdir, future.result())
+                pack.commit()
+                job.remove_workdir()
+            self._store(job, trace)
+
+        future.add_done_callback(_stored)
+        self.persisting.append(future)
+
+
+    def _prefetch(self):
+        # model files and working directories of the next jobs are prepared by worker
+        # threads
+        for job in itertools.islice(self.jobs, self.prefetch):
+            if job not in self.prefetched:
+                self.prefetched[job] = asyncio.get_event_loop().run_in_executor(
+                    None, self._prefetch_job, job)
+
+
+    @staticmethod
+    def _prefetch_job(job):
+        job.prefetch_model()
+        job.create_workdir()
+
+
+    async def _prepare(self, job):
+        # working directory of a job that is started, counts whether it was prefetched
+        # before the job started. Queued jobs are not finished (see _resume), files of
+        # earlier runs are removed.
+        future = self.prefetched.pop(job, None)
+        if future is None:
+            if self.prefetch > 0:
+                self.prefetch_misses += 1
+            job.create_workdir()
+            return
+        if future.done():
+            self.prefetch_hits += 1
+        else:
+            self.prefetch_misses += 1
+        await future
+
+
+    def _commit(self):
+        self.manifest.commit()
+        if self.cache is not None:
+            self.cache.commit()
+
+
+    def _cached(self, job, slot):
+        # collects a job from the cache, returns whether it was cached
+        if self.cache is None:
+            return False
+        job.create_workdir()
+        trace = self.cache.get(self.cache.key(job, self.runner), job.rundir)
+        if trace is None:
+            job.remove_rundir()
+            return False
+        self._collect(job, Result(trace, "", ""), slot, store=False)
+        self._persist(job, trace)
+        return True
+
+
+    def _cache(self, job, result):
+        # results of killed jobs depend on the load of the machine, failures may be
+        # transient (license, file system), only clean results are cached
+        if (self.cache is None or result.kill_signal() is not None or result.out_of_memory() or
+                result.failed()):
+            return
+        self.cache.add(self.cache.key(job, self.runner), result.trace, job.rundir,
+                       [job.filename()])
+
+
+    def _demand(self, job, capacity):
+        # cores and memory used by a job, at most the capacity
+        n_threads, memory_budget = capacity
+        weight = min(job.weight, n_threads)
+        if memory_budget is None:
+            return (weight, 0)
+        memory = None
+        if self.cost_model is not None:
+            memory = self.cost_model.peak_memory(job.name,
+                                                 self._configuration_name(job.configuration))
+        if memory is None:
+            memory = memory_budget * weight / n_threads
+        return (weight, min(memory, memory_budget))
+
+
+    def _next_job(self, capacity, running):
+        # Takes the next job from the queue whose demand fits into the free cores and
+        # memory. If the first job does not fit, it gets a reservation for the time at
+        # which enough resources are expected to be free. Later jobs may only start
+        # (backfill) if they do not delay this reservation, so that jobs with a large
+        # demand do not starve.
+        if len(self.jobs) == 0:
+            return None
+        free = [capacity[0], capacity[1] or 0]
+        for _, _, _, demand in running.values():
+            free = [f - d for f, d in zip(free, demand)]
+        head = self._demand(self.jobs[0], capacity)
+        if all(d <= f for d, f in zip(head, free)):
+            return self.jobs.popleft()
+
+        # reservation of first job
+        reserved_time = self._duration()
+        reserved_free = list(free)
+        for _, _, end, demand in sorted(running.values(), key=lambda entry: entry[2]):
+            reserved_time = end
+            reserved_free = [f + d for f, d in zip(reserved_free, demand)]
+            if all(d <= f for d, f in zip(head, reserved_free)):
+                break
+        reserved_free = [f - d for f, d in zip(reserved_free, head)]
+
+        # backfill
+        for i, job in enumerate(self.jobs):
+            demand = self._demand(job, capacity)
+            if i == 0 or any(d > f for d, f in zip(demand, free)):
+                continue
+            if (self._duration() + self._runtime(job) <= reserved_time or
+                    all(d <= f for d, f in zip(demand, reserved_free))):
+                del self.jobs[i]
+                return job
+        return None
+
+
+    def _runtime(self, job):
+        if self.cost_model is None:
+            return job.max_time
+        return self.cost_model.runtime(job.name, self._configuration_name(job.configuration),
+                                       job.max_time, job.kill_time)
+
+
+    def _fits(self, job, max_duration):
+        # job is only started if it is expected to finish within max_duration
+        return self._duration() + self._runtime(job) <= max_duration
+
+
+    def _skip(self, job, slot):
+        # working directory created for a prefetched job is removed, a failed prefetch
+        # of a job that is not run is ignored
+        def _remove(future):
+            if future.cancelled():
+                return
+            future.exception()
+            job.remove_workdir()
+
+        future = self.prefetched.pop(job, None)
+        if future is not None:
+            future.add_done_callback(_remove)
+        trace = TraceRecord(job.filename())
+        trace.record['SolverStatus'] = 12
+        trace.record['ModelStatus'] = 14
+        self.skipped.append(job)
+        self.output.print(job, Result(trace, "", ""), self._duration(), self.num_jobs(), slot)
+
+
+    def _store(self, job, trace):
+        # records a finished job in the manifest
+        self.manifest.add(self._configuration_name(job.configuration), trace, job.key())
+
+
+    def _collect(self, job, result, slot, store=True):
+        conf_name = self._configuration_name(job.configuration)
+        if store:
+            self._store(job, result.trace)
+        self.output.print(job, result, self._duration(), self.num_jobs(), slot)
+        if job.repeat is None:
+            self.writers[conf_name].append(result.trace)
+            return
 
-            self.output.print(job, result, self._duration(), self.num_jobs(), thread_id)
+        # the trace file gets the representative of all repeats of a job
+        repeats = self.repeats.setdefault((conf_name, job.filename()), dict())
+        repeats[job.repeat] = result.trace
+        if len(repeats) == self.repeat:
+            summary = RepeatSummary(job.filename(), repeats)
+            self.writers[conf_name].append(summary.trace())
+            self.summary_writers[conf_name].append(summary)
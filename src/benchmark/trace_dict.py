@@ -2,16 +2,166 @@
 """ TraceDict """
 
 import os
+import math
+import array
+import concurrent.futures
 
 from trace_record import TraceRecord
+from trace_record import TRACE_ENTRIES_INTEGER, TRACE_ENTRIES_REAL
+from trace_reader import TraceReader, read_table
+
+# trace files below this number are read without worker processes
+PARALLEL_FILES = 64
 
 class TraceDict:
     """
     Database of Trace Records
+    Records are stored column-wise: a typed array per trace entry, string entries as
+    ids of interned strings and NA as mask
     """
 
     def __init__(self):
-        self.records = dict()
+        self.defaults = TraceRecord(None).record
+        self.keys = list(self.defaults)
+        self.index = dict()
+        self.columns = dict()
+        self.missing = dict()
+        self.strings = dict()
+        self.string_ids = dict()
+        for key in self.keys:
+            if key in TRACE_ENTRIES_REAL:
+                self.columns[key] = array.array('d')
+            elif key in TRACE_ENTRIES_INTEGER:
+                self.columns[key] = array.array('q')
+            else:
+                self.columns[key] = array.array('i')
+                self.strings[key] = list()
+                self.string_ids[key] = dict()
+            self.missing[key] = bytearray()
+
+
+    def __len__(self):
+        return len(self.index)
+
+
+    def __contains__(self, name):
+        return name in self.index
+
+
+    def _set(self, row, key, value):
+        # stores a value, None or NaN as NA
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            self.missing[key][row] = 1
+            return
+        if key in self.strings:
+            value = str(value)
+            ids = self.string_ids[key]
+            if value not in ids:
+                ids[value] = len(self.strings[key])
+                self.strings[key].append(value)
+            value = ids[value]
+        elif key in TRACE_ENTRIES_INTEGER:
+            value = int(value)
+        else:
+            value = float(value)
+        self.columns[key][row] = value
+        self.missing[key][row] = 0
+
+
+    def _get(self, row, key):
+        if self.missing[key][row]:
+            return None
+        value = self.columns[key][row]
+        if key in self.strings:
+            return self.strings[key][value]
+        return value
+
+
+    def _new_row(self, name):
+        row = len(self.index)
+        self.index[name] = row
+        for key in self.keys:
+            self.columns[key].append(0)
+            self.missing[key].append(1)
+        return row
+
+
+    def _row(self, name, reset=False):
+        # row of a record, new (or reset) rows hold the default values of a trace record
+        row = self.index.get(name)
+        if row is None:
+            row = self._new_row(name)
+            reset = True
+        if reset:
+            for key in self.keys:
+                self._set(row, key, self.defaults[key])
+            self._set(row, 'InputFileName', name)
+        return row
+
+
+    def _append_row(self, values):
+        row = self.index.get(values.get('InputFileName'))
+        if row is None:
+            row = self._new_row(values.get('InputFileName'))
+        for key in self.keys:
+            self._set(row, key, values.get(key, self.defaults[key]))
+
+
+    def _append_table(self, n_rows, table, keys=None):
+        # appends the records of a trace file given column-wise, by extending each
+        # column at once. Entries not in keys are NA. Records of names in the database
+        # (or repeated) replace rows.
+        skipped = [key for key in self.keys if keys is not None and key not in keys]
+        names = table.get('InputFileName', [None] * n_rows)
+        if len(set(names)) < n_rows or (self.index and any(name in self.index
+                                                           for name in names)):
+            for row in range(n_rows):
+                values = dict.fromkeys(skipped)
+                values.update((key, column[row]) for key, column in table.items())
+                self._append_row(values)
+            return
+        for row, name in enumerate(names, len(self.index)):
+            self.index[name] = row
+        for key in self.keys:
+            if key in table:
+                self._extend(key, table[key])
+            elif key in skipped:
+                self._extend_missing(key, n_rows)
+            else:
+                self._extend(key, [self.defaults[key]] * n_rows)
+
+
+    def _extend(self, key, values):
+        # appends values (as read, or default values) to a column, None or NaN as NA
+        if key in TRACE_ENTRIES_REAL:
+            if None in values:
+                values = [math.nan if value is None else value for value in values]
+            self.columns[key].extend(values)
+            self.missing[key].extend(map(math.isnan, values))
+            return
+        has_missing = None in values
+        missing = [value is None for value in values] if has_missing else bytes(len(values))
+        if key in self.strings:
+            ids = self.string_ids[key]
+            for value in dict.fromkeys(values):
+                if value is not None and value not in ids:
+                    ids[value] = len(self.strings[key])
+                    self.strings[key].append(value)
+            if has_missing:
+                values = [0 if value is None else ids[value] for value in values]
+            else:
+                values = list(map(ids.__getitem__, values))
+        elif has_missing:
+            values = [0 if value is None else value for value in values]
+        self.columns[key].extend(values)
+        self.missing[key].extend(missing)
+
+
+    def _extend_missing(self, key, n_rows):
+        # appends NA values to a column
+        column = self.columns[key]
+        column.frombytes(bytes(column.itemsize * n_rows))
+        self.missing[key].extend(b'\x01' * n_rows)
 
 
     def append(self, trace_record):
@@ -23,10 +173,51 @@ class TraceDict:
         trace_record: TraceRecord
             Trace Record to be added
         """
-        self.records[trace_record.record['InputFileName']] = trace_record
+        self._append_row(trace_record.record)
 
 
-    def append_trc(self, trcfile):
+    def get(self, name):
+        """
+        Returns the trace record of an input file or None if not in database
+
+        Arguments
+        ---------
+        name: str
+            Input file name
+        """
+        row = self.index.get(name)
+        if row is None:
+            return None
+        trace = TraceRecord(None)
+        for key in self.keys:
+            trace.record[key] = self._get(row, key)
+        return trace
+
+
+    def names(self):
+        """
+        Returns the input file names of the records, in the order of the column values
+        """
+        return list(self.index)
+
+
+    def column(self, key):
+        """
+        Returns the values of a numerical trace entry of all records and its NA mask
+        (1: NA) as buffers (array, bytearray), which can be wrapped without copying,
+        e.g. by numpy.frombuffer
+
+        Arguments
+        ---------
+        key: str
+            Trace entry (integer or real)
+        """
+        if key in self.strings:
+            raise ValueError("%s is not a numerical trace entry" % key)
+        return self.columns[key], self.missing[key]
+
+
+    def append_trc(self, trcfile, keys=None):
         """
         Add trace entries located in a trace file to database
 
@@ -34,10 +225,37 @@ class TraceDict:
         ---------
         trcfile: str
             Path to trace file
+        keys: list
+            Trace entries loaded (default: all), other entries are NA. Loading only the
+            needed entries saves most of the time for large files.
+        """
+        if keys is not None:
+            keys = set(keys) | {'InputFileName'}
+        self._append_table(*TraceReader(trcfile).table(keys), keys)
+
+
+    def append_trcs(self, trcfiles, max_workers=None):
         """
-        trc = TraceRecord(None)
-        trc.load_trc(trcfile)
-        self.append(trc)
+        Add trace entries located in many trace files to database. The files are
+        parsed in parallel by worker processes.
+
+        Arguments
+        ---------
+        trcfiles: list
+            Paths to trace files
+        max_workers: int
+            Number of worker processes (default: number of cpus)
+        """
+        trcfiles = list(trcfiles)
+        if len(trcfiles) < PARALLEL_FILES or max_workers == 1:
+            tables = map(read_table, trcfiles)
+        else:
+            n_workers = max_workers or os.cpu_count()
+            chunksize = max(1, len(trcfiles) // (4 * n_workers))
+            with concurrent.futures.ProcessPoolExecutor(n_workers) as executor:
+                tables = list(executor.map(read_table, trcfiles, chunksize=chunksize))
+        for n_rows, table in tables:
+            self._append_table(n_rows, table)
 
 
     def load_solu(self, solufile):
@@ -60,31 +278,29 @@ class TraceDict:
             if len(entry) < 2:
                 continue
             if entry[0] == '=opt=':
-                trc = TraceRecord(entry[1])
-                trc.record['ModelStatus'] = 1
-                trc.record['ObjectiveValue'] = float(entry[2])
-                trc.record['ObjectiveValueEstimate'] = float(entry[2])
-                self.append(trc)
+                row = self._row(entry[1], reset=True)
+                self._set(row, 'ModelStatus', 1)
+                self._set(row, 'ObjectiveValue', float(entry[2]))
+                self._set(row, 'ObjectiveValueEstimate', float(entry[2]))
             elif entry[0] == '=inf=':
-                trc = TraceRecord(entry[1])
-                trc.record['ModelStatus'] = 4
-                self.append(trc)
+                row = self._row(entry[1], reset=True)
+                self._set(row, 'ModelStatus', 4)
             elif entry[0] == '=best=':
-                if entry[1] in self.records:
-                    self.records[entry[1]].record['ObjectiveValue'] = float(entry[2])
-                else:
-                    trc = TraceRecord(entry[1])
-                    trc.record['ModelStatus'] = 2
-                    trc.record['ObjectiveValue'] = float(entry[2])
-                    self.append(trc)
+                if entry[1] not in self.index:
+                    self._set(self._row(entry[1]), 'ModelStatus', 2)
+                self._set(self.index[entry[1]], 'ObjectiveValue', float(entry[2]))
             elif entry[0] == '=bestdual=':
-                if entry[1] in self.records:
-                    self.records[entry[1]].record['ObjectiveValueEstimate'] = float(entry[2])
-                else:
-                    trc = TraceRecord(entry[1])
-                    trc.record['ModelStatus'] = 2
-                    trc.record['ObjectiveValueEstimate'] = float(entry[2])
-                    self.append(trc)
+                if entry[1] not in self.index:
+                    self._set(self._row(entry[1]), 'ModelStatus', 2)
+                self._set(self.index[entry[1]], 'ObjectiveValueEstimate', float(entry[2]))
+
+
+    def _line(self, row):
+        values = list()
+        for key in self.keys:
+            value = self._get(row, key)
+            values.append("NA" if value is None else str(value))
+        return ",".join(values) + "\n"
 
 
     def write(self, trcfile):
@@ -96,9 +312,9 @@ class TraceDict:
         trcfile: str
             Path to trace file
         """
-        if len(self.records) == 0:
+        if len(self.index) == 0:
             return
-        for i, key in enumerate(sorted(self.records.keys())):
-            if i == 0:
-                self.records[key].write_header(trcfile)
-            self.records[key].write_record(trcfile)
+        with open(trcfile, 'w') as fio:
+            fio.write(TraceRecord(None).header())
+            for name in sorted(self.index):
+                fio.write(self._line(self.index[name]))
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+""" TraceReader """
+
+import math
+import operator
+
+from trace_record import TraceRecord
+from trace_record import TRACE_ENTRIES, TRACE_ENTRIES_EXTRA
+from trace_record import TRACE_ENTRIES_INTEGER, TRACE_ENTRIES_REAL
+
+MISSING = frozenset(['NA', ''])
+
+# number of distinct values per column remembered by the converter
+MEMO_SIZE = 1024
+
+# lines split at once when a trace file is read column-wise, the elements not
+# returned are dropped before the next lines are split
+TABLE_CHUNK_LINES = 1024
+
+def _string(element):
+    return None if element in MISSING else element
+
+
+def _integer(element):
+    if element in MISSING:
+        return None
+    try:
+        return int(element)
+    except ValueError:
+        return None
+
+
+def _real(element):
+    if element in MISSING:
+        return None
+    try:
+        return float(element)
+    except ValueError:
+        return None
+
+
+def _convert_column(key, convert, elements):
+    # converts the elements of a column (which may be padded with spaces), real and
+    # string columns without a function call per element. NA of real entries is NaN.
+    if key in TRACE_ENTRIES_REAL:
+        try:
+            if not any(element in elements for element in MISSING):
+                return list(map(float, elements))
+            return [math.nan if element in MISSING else float(element) for element in elements]
+        except ValueError:
+            return [math.nan if value is None else value
+                    for value in map(convert, map(str.strip, elements))]
+    if key in TRACE_ENTRIES_INTEGER:
+        return list(map(convert, elements))
+    return [None if element in MISSING else element for element in map(str.strip, elements)]
+
+
+class _Memo(dict):
+    # remembers the values of the first MEMO_SIZE distinct elements of a column,
+    # most integer and string columns (statuses, solver names) have only a few
+    def __init__(self, convert):
+        dict.__init__(self)
+        self.convert = convert
+
+    def __missing__(self, element):
+        value = self.convert(element)
+        if len(self) < MEMO_SIZE:
+            self[element] = value
+        return value
+
+
+def _converter(key):
+    # converter of a trace entry, None for entries unknown to the benchmark
+    if key in TRACE_ENTRIES_INTEGER:
+        return _Memo(_integer).__getitem__
+    if key in TRACE_ENTRIES_REAL:
+        return _real
+    if key in TRACE_ENTRIES or key in TRACE_ENTRIES_EXTRA:
+        return _Memo(_string).__getitem__
+    return None
+
+
+class TraceReader:
+    """
+    Streams the records of a trace file (traceopt 3 or 5). The trace record definition
+    is compiled into a converter per column once, records are read line by line.
+    """
+
+    def __init__(self, trcfile):
+        self.trcfile = trcfile
+        self.columns = list()
+        self.n_columns = 0
+        self.traceopt = 3
+
+
+    def _compile(self, header):
+        # columns unknown to the benchmark are left out
+        self.columns = [(i, key, _converter(key)) for i, key in enumerate(header)]
+        self.columns = [column for column in self.columns if column[2] is not None]
+        self.n_columns = len(header)
+
+
+    def _header(self, line, header):
+        # reads a line of the trace record definition, returns whether it has ended
+        line = line[1:].strip()
+        # empty comment line -> end of header
+        if len(line) == 0:
+            self._compile(header)
+            return True
+        line = line.strip(',')
+        if line[-2:] == '\\n':
+            self.traceopt = 5
+            line = line[:-2]
+        header += [key.strip() for key in line.split(',')]
+        return False
+
+
+    def _open(self):
+        # trace file given by path or as file object (e.g. read from a result pack)
+        if isinstance(self.trcfile, str):
+            return open(self.trcfile, 'r')
+        return self.trcfile
+
+
+    def _elements(self, lines):
+        # yields the elements of the records, converted by the columns of the current
+        # trace record definition
+        header = None
+        values = list()
+        for line in lines:
+            # read header
+            if line[0] == '*':
+                if line.find('GamsSolve') >= 0 or line.find('GamsExit') >= 0:
+                    continue
+                if line.find('Trace Record Definition') >= 0:
+                    header = list()
+                    self.traceopt = 3
+                elif header is not None and self._header(line, header):
+                    header = None
+                continue
+
+            # get elements, one record per line (traceopt 3) or one element per
+            # line (traceopt 5)
+            line = line.rstrip('\n')
+            if self.traceopt == 3:
+                if len(line.strip()) == 0:
+                    continue
+                values = line.split(',')
+            else:
+                values.append(line)
+                if len(values) < self.n_columns:
+                    continue
+            if ' ' in line or self.traceopt == 5:
+                values = [value.strip() for value in values]
+            yield values
+            values = list()
+
+
+    def rows(self):
+        """
+        Yields the records of the trace file as dict of trace entry to value, entries
+        unknown to the benchmark are left out
+        """
+        with self._open() as fio:
+            for values in self._elements(fio):
+                if len(values) < self.n_columns:
+                    yield {key: convert(values[i]) for i, key, convert in self.columns
+                           if i < len(values)}
+                else:
+                    yield {key: convert(values[i]) for i, key, convert in self.columns}
+
+
+    def table(self, keys=None):
+        """
+        Returns the records of the trace file column-wise: number of records and dict
+        of trace entry to list of values. Entries unknown to the benchmark are left
+        out, entries not in (a part of) the file and missing elements of incomplete
+        lines are NA (None, NaN for real entries read from the file).
+
+        Records of a file with one trace record definition (traceopt 3) are split in
+        chunks and each column is picked and converted at once, other files are read
+        line by line.
+
+        Arguments
+        ---------
+        keys: list
+            Trace entries returned (default: all)
+        """
+        with self._open() as fio:
+            lines = fio.readlines()
+        start = 0
+        while start < len(lines) and lines[start][0] == '*':
+            start += 1
+        for _ in self._elements(lines[:start]):
+            pass
+        if self.traceopt != 3 or self.n_columns == 0 or \
+                any(line[0] == '*' for line in lines[start:]):
+            return self._table(lines, keys)
+
+        columns = [column for column in self.columns if keys is None or column[1] in keys]
+        elements = [list() for _ in columns]
+        body = [line.rstrip('\n') for line in lines[start:] if not line.isspace()]
+        # lines are split up to the last returned element (the rest of a line is left
+        # as one element), lines without all returned elements (of an interrupted
+        # write) are padded by the line by line reader
+        last = max((i for i, _, _ in columns), default=0)
+        for chunk in range(0, len(body), TABLE_CHUNK_LINES):
+            records = [line.split(',', last + 1)
+                       for line in body[chunk:chunk + TABLE_CHUNK_LINES]]
+            if min(map(len, records)) <= last:
+                return self._table(lines, keys)
+            for column, (i, _, _) in zip(elements, columns):
+                column.extend(map(operator.itemgetter(i), records))
+        return len(body), {key: _convert_column(key, convert, column)
+                           for (_, key, convert), column in zip(columns, elements)}
+
+
+    def _table(self, lines, keys):
+        # records of the lines column-wise, read line by line. Only the elements of the
+        # returned entries are kept of a line.
+        table = dict()
+        n_rows = 0
+        block = list()
+        definition = None
+        columns = list()
+        indices = list()
+        for values in self._elements(lines):
+            if self.columns is not definition:
+                n_rows = self._transpose(table, n_rows, block, columns)
+                block = list()
+                definition = self.columns
+                columns = [column for column in self.columns
+                           if keys is None or column[1] in keys]
+                indices = [i for i, _, _ in columns]
+            if len(values) < self.n_columns:
+                values += [''] * (self.n_columns - len(values))
+            block.append([values[i] for i in indices])
+        n_rows = self._transpose(table, n_rows, block, columns)
+        return n_rows, table
+
+
+    @staticmethod
+    def _transpose(table, n_rows, block, columns):
+        # adds the lines of a part of the file with the same trace record definition
+        # to the columns, returns the number of records
+        if len(block) == 0:
+            return n_rows
+        for (_, key, convert), elements in zip(columns, zip(*block)):
+            table.setdefault(key, [None] * n_rows).extend(_convert_column(key, convert, elements))
+        n_rows += len(block)
+        for column in table.values():
+            if len(column) < n_rows:
+                column.extend([None] * (n_rows - len(column)))
+        return n_rows
+
+
+    def records(self):
+        """
+        Yields the records of the trace file as trace records
+        """
+        for row in self.rows():
+            trace = TraceRecord(None)
+            trace.record.update(row)
+            yield trace
+
+
+def read_rows(trcfile):
+    """
+    Returns the records of a trace file as list of dict of trace entry to value
+
+    Arguments
+    ---------
+    trcfile: str
+        Path to trace file
+    """
+    return list(TraceReader(trcfile).rows())
+
+
+def read_table(trcfile, keys=None):
+    """
+    Returns the records of a trace file column-wise (see TraceReader.table)
+
+    Arguments
+    ---------
+    trcfile: str
+        Path to trace file
+    keys: list
+        Trace entries returned (default: all)
+    """
+    return TraceReader(trcfile).table(keys)
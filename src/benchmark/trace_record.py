@@ -14,20 +14,30 @@ TRACE_ENTRIES = [
     'SolverTime', 'NumberOfIterations', 'NumberOfDomainViolations', 'NumberOfNodes'
 ]
 
+# benchmark entries appended to the GAMS trace record definition
+TRACE_ENTRIES_EXTRA = [
+    'Affinity', 'PeakRSS', 'OutOfMemory', 'CPUUser', 'CPUSystem', 'ContextSwitchesVoluntary',
+    'ContextSwitchesInvoluntary', 'IORead', 'IOWrite', 'Processes', 'KillSignal', 'KillTime',
+    'ModelLink'
+]
+
 TRACE_ENTRIES_STRING = [
-    'InputFileName', 'ModelType', 'SolverName', 'NLP', 'MIP', 'OptionFile'
+    'InputFileName', 'ModelType', 'SolverName', 'NLP', 'MIP', 'OptionFile', 'Affinity',
+    'ModelLink'
 ]
 
 TRACE_ENTRIES_INTEGER = [
     'Direction', 'NumberOfEquations', 'NumberOfVariables',
     'NumberOfDiscreteVariables', 'NumberOfNonZeros', 'NumberOfNonlinearNonZeros',
     'ModelStatus', 'SolverStatus', 'NumberOfIterations', 'NumberOfDomainViolations',
-    'NumberOfNodes'
+    'NumberOfNodes', 'OutOfMemory', 'ContextSwitchesVoluntary', 'ContextSwitchesInvoluntary',
+    'Processes', 'KillSignal'
 ]
 
 TRACE_ENTRIES_REAL = [
     'JulianDate', 'ObjectiveValue', 'ObjectiveValueEstimate', 'ETSolver', 'ETSolve',
-    'ETInterface', 'ETInterfaceOverhead', 'SolverTime'
+    'ETInterface', 'ETInterfaceOverhead', 'SolverTime', 'PeakRSS', 'CPUUser', 'CPUSystem',
+    'IORead', 'IOWrite', 'KillTime'
 ]
 
 class TraceRecord:
@@ -37,7 +47,7 @@ class TraceRecord:
 
     def __init__(self, filename):
         self.record = dict()
-        for key in TRACE_ENTRIES:
+        for key in TRACE_ENTRIES + TRACE_ENTRIES_EXTRA:
             self.record[key] = None
         self.record['InputFileName'] = filename
 
@@ -97,86 +107,44 @@ class TraceRecord:
 
     def load_trc(self, trcfile):
         """
-        Loads solve attributes from a trace file
+        Loads solve attributes from a trace file (of its last record)
 
         Arguments
         ---------
-        trcfile: str
-            Path to trace file
+        trcfile: str or file
+            Path to trace file or trace file object
         """
-        # pylint: disable=too-many-branches,too-many-statements
+        # pylint: disable=import-outside-toplevel
+        from trace_reader import TraceReader
 
-        with open(trcfile, 'r') as fio:
-            lines = fio.readlines()
+        for row in TraceReader(trcfile).rows():
+            self.record.update(row)
 
-        header = list()
-        header_read = False
-        header_it = iter(header)
-        traceopt = 3
-        for line in lines:
-            # read header
-            if line[0] == '*':
-                # skip GamsSolve, GamsExit line
-                if line.find('GamsSolve') >= 0:
-                    continue
-                if line.find('GamsExit') >= 0:
-                    continue
-
-                if line.find('Trace Record Definition') >= 0:
-                    header_read = True
-                    continue
-
-                if header_read:
-                    # remove '*' and spaces
-                    line = line[1:].strip()
-                    # empty comment line -> end of header
-                    if len(line) == 0:
-                        header_read = False
-                        header_it = iter(header)
-                        continue
-                    if line[0] == ',':
-                        line = line[1:]
-                    if line[-1] == ',':
-                        line = line[:-1]
-                    if line[-2:] == '\\n':
-                        traceopt = 5
-                        line = line[:-2]
-
-                    # append to trace record definition
-                    for key in line.split(','):
-                        header.append(key.strip())
-                continue
-
-            # get elements
-            if traceopt == 3:
-                elements = line.split(',')
-            elif traceopt == 5:
-                elements = [line.replace('\n', '')]
-            for element in elements:
-                element = element.strip()
-
-                # update iterator
-                current_header = next(header_it)
-                if current_header == header[-1]:
-                    header_it = iter(header)
-
-                # parse element
-                if element == "NA" or len(element) == 0:
-                    element = None
-                if current_header in TRACE_ENTRIES_INTEGER:
-                    try:
-                        element = int(element)
-                    except (ValueError, TypeError):
-                        element = None
-                if current_header in TRACE_ENTRIES_REAL:
-                    try:
-                        element = float(element)
-                    except (ValueError, TypeError):
-                        element = None
-
-                # store element
-                if current_header in TRACE_ENTRIES:
-                    self.record[current_header] = element
+
+    def header(self):
+        """
+        Returns the trace file definition
+        """
+        header = "* Trace Record Definition\n"
+        for i, key in enumerate(self.record):
+            header += "* %s" % key
+            if i < len(self.record)-1:
+                header += ","
+            header += "\n"
+        return header + "*\n"
+
+
+    def line(self):
+        """
+        Returns the trace record as line of a trace file
+        """
+        values = list()
+        for value in self.record.values():
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                values.append("NA")
+            else:
+                values.append(str(value))
+        return ",".join(values) + "\n"
 
 
     def write_header(self, trcfile):
@@ -189,13 +157,7 @@ class TraceRecord:
             Path to trace file
         """
         with open(trcfile, 'w') as fio:
-            fio.write("* Trace Record Definition\n")
-            for i, key in enumerate(self.record):
-                fio.write("* %s" % key)
-                if i < len(self.record)-1:
-                    fio.write(",")
-                fio.write("\n")
-            fio.write("*\n")
+            fio.write(self.header())
 
 
     def write_record(self, trcfile):
@@ -208,14 +170,7 @@ class TraceRecord:
             Path to trace file
         """
         with open(trcfile, 'a') as fio:
-            for i, (_, value) in enumerate(self.record.items()):
-                if i > 0:
-                    fio.write(",")
-                if value is None or (isinstance(value, float) and math.isnan(value)):
-                    fio.write("NA")
-                else:
-                    fio.write(str(value))
-            fio.write("\n")
+            fio.write(self.line())
 
     def write(self, trcfile):
         """
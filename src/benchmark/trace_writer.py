@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+""" TraceWriter """
+
+import os
+import time
+
+from trace_record import TraceRecord
+
+# pending records are flushed once there are this many of them ...
+FLUSH_RECORDS = 16
+# ... or once the last flush is this many seconds ago
+FLUSH_INTERVAL = 5
+
+class TraceWriter:
+    """
+    Appends trace records to the trace file of a configuration while the benchmark
+    is running, so that an interrupted benchmark leaves a valid trace file behind
+    """
+
+    def __init__(self, trcfile, header=None):
+        """
+        Arguments
+        ---------
+        trcfile: str
+            Path to trace file
+        header: str
+            Header of the file (default: trace record definition)
+        """
+        self.trcfile = trcfile
+        self.header = header
+        if header is None:
+            self.header = TraceRecord(None).header()
+        self.lines = dict()
+        self.pending = list()
+        self.last_flush = time.time()
+
+
+    @staticmethod
+    def _write_atomic(path, data):
+        # written to a temporary file that replaces the file, readers never see a
+        # partially written file
+        tmpfile = path + '.tmp'
+        with open(tmpfile, 'w') as fio:
+            fio.write(data)
+            fio.flush()
+            os.fsync(fio.fileno())
+        os.replace(tmpfile, path)
+
+
+    def open(self, records=None):
+        """
+        Loads the records of an existing trace file. Incomplete lines (of a write that
+        was interrupted) and duplicate records are removed. A trace file with a
+        different trace record definition is rebuilt from the given records.
+
+        Arguments
+        ---------
+        records: list
+            Trace records of the file (e.g. of the finished jobs in the manifest),
+            written if the file has another header
+        """
+        self.lines = dict()
+        self.pending = list()
+        if not os.path.exists(self.trcfile):
+            return
+
+        with open(self.trcfile, 'r') as fio:
+            content = fio.read()
+        valid = content.startswith(self.header)
+        if not valid:
+            for trace_record in records or list():
+                self.lines[trace_record.record['InputFileName']] = trace_record.line()
+        else:
+            n_entries = self.header.count(',') + 1
+            lines = content[len(self.header):].splitlines(keepends=True)
+            for line in lines:
+                if not line.endswith('\n') or line.count(',') + 1 != n_entries:
+                    valid = False
+                    continue
+                name = line.split(',', 1)[0]
+                valid = valid and name not in self.lines
+                self.lines[name] = line
+
+        if not valid:
+            self._rewrite()
+
+
+    def append(self, trace_record):
+        """
+        Adds a trace record, which is written with the next flush
+
+        Arguments
+        ---------
+        trace_record: TraceRecord
+            Trace record (or record with line of the file) to be added
+        """
+        line = trace_record.line()
+        name = trace_record.record['InputFileName']
+        if self.lines.get(name) == line:
+            return
+        if name in self.lines:
+            # a record is only replaced by rewriting the file
+            self.lines[name] = line
+            self._rewrite()
+            return
+        self.lines[name] = line
+        self.pending.append(line)
+        if len(self.pending) >= FLUSH_RECORDS or time.time() - self.last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+
+    def flush(self):
+        """
+        Writes the pending trace records to the trace file
+        """
+        if len(self.pending) == 0:
+            return
+        if not os.path.exists(self.trcfile):
+            os.makedirs(os.path.dirname(self.trcfile), exist_ok=True)
+            self._write_atomic(self.trcfile, self.header)
+
+        # one write per flush, a torn line can only be left by a crash during the write
+        # and is removed by open
+        fd = os.open(self.trcfile, os.O_WRONLY | os.O_APPEND)
+        try:
+            os.write(fd, ''.join(self.pending).encode())
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self.pending = list()
+        self.last_flush = time.time()
+
+
+    def _rewrite(self):
+        self.pending = list()
+        self.last_flush = time.time()
+        if len(self.lines) == 0:
+            if os.path.exists(self.trcfile):
+                os.remove(self.trcfile)
+            return
+        os.makedirs(os.path.dirname(self.trcfile), exist_ok=True)
+        self._write_atomic(self.trcfile, self.header +
+                           ''.join(self.lines[name] for name in sorted(self.lines)))
+
+
+    def close(self):
+        """
+        Writes the final trace file with records sorted by input file name
+        """
+        self._rewrite()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+""" Test configuration """
+
+import os
+import sys
+
+# the benchmark modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src',
+                                'benchmark'))
+
+from trace_record import TraceRecord # pylint: disable=wrong-import-position
+
+
+def trace_record(name, **entries):
+    """
+    Returns a trace record of an input file with default values except the given entries
+
+    Arguments
+    ---------
+    name: str
+        Input file name
+    entries: dict
+        Trace entries
+    """
+    trace = TraceRecord(name)
+    trace.record.update(entries)
+    return trace
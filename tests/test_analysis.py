@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+""" Tests of Analysis """
+
+import numpy as np
+import pytest
+
+from conftest import trace_record
+from analysis import Analysis, STATUS_OPTIMAL, STATUS_LIMIT, STATUS_WRONG, STATUS_MISSING
+from trace_dict import TraceDict
+
+
+def _record(name, **entries):
+    # minimization solved to optimality unless given otherwise
+    return trace_record(name, **dict(dict(Direction=0, ModelStatus=1, SolverStatus=1),
+                                     **entries))
+
+
+def _write(path, records):
+    traces = TraceDict()
+    for trace in records:
+        traces.append(trace)
+    traces.write(str(path))
+    return str(path)
+
+
+def _analysis(tmp_path, configurations, solu=None):
+    paths = list()
+    for label, records in configurations.items():
+        paths.append(_write(tmp_path / ('%s.trc' % label), records))
+    analysis = Analysis(max_time=100, shift=10)
+    analysis.load(paths)
+    if solu is not None:
+        solufile = tmp_path / 'test.solu'
+        solufile.write_text(solu)
+        analysis.load_solu(str(solufile))
+    return analysis
+
+
+def test_load_columns(tmp_path):
+    analysis = _analysis(tmp_path, {
+        'a': [_record('x.gms', SolverTime=1.5, ObjectiveValue=2.0),
+              _record('y.gms', SolverTime=3.0, ObjectiveValue=None)],
+        'b': [_record('y.gms', SolverTime=4.0, SolverStatus=3)],
+    })
+    assert analysis.configurations == ['a', 'b']
+    assert analysis.instances == ['x', 'y']
+    assert analysis.present.tolist() == [[True, True], [False, True]]
+    assert analysis.data['SolverTime'][0].tolist() == [1.5, 3.0]
+    assert analysis.data['ObjectiveValue'][0, 0] == 2.0
+    assert np.isnan(analysis.data['ObjectiveValue'][0, 1])
+    assert np.isnan(analysis.data['SolverTime'][1, 0])
+    assert analysis.data['SolverStatus'][1, 1] == 3
+    assert analysis.statuses().tolist() == [[STATUS_OPTIMAL, STATUS_OPTIMAL],
+                                            [STATUS_MISSING, STATUS_LIMIT]]
+
+
+def test_shifted_geometric_mean():
+    analysis = Analysis(shift=10)
+    # sqrt((0 + 10) * (30 + 10)) - 10
+    assert analysis.shifted_geometric_mean(np.array([0.0, 30.0])) == pytest.approx(10.0)
+    assert analysis.shifted_geometric_mean(np.array([5.0, 5.0])) == pytest.approx(5.0)
+    means = analysis.shifted_geometric_mean(np.array([[0.0, 0.0], [0.0, 30.0]]), axis=1)
+    assert means == pytest.approx([0.0, 10.0])
+
+
+def test_profiles():
+    times = np.array([[1.0, 10.0, 5.0, 1.0],
+                      [2.0, 1.0, 5.0, 1.0]])
+    solved = np.array([[True, True, True, False],
+                       [True, True, False, False]])
+    profiles = Analysis.profiles(times, solved, taus=[1, 2, 10])
+    # instance 4 is solved by no configuration, not counted for any ratio
+    assert profiles[0].tolist() == [0.5, 0.5, 0.75]
+    assert profiles[1].tolist() == [0.25, 0.5, 0.5]
+
+
+def test_times_unsolved(tmp_path):
+    analysis = _analysis(tmp_path, {
+        'a': [_record('x.gms', SolverTime=1.5, ETInterface=2.0),
+              _record('y.gms', SolverTime=3.0, SolverStatus=3),
+              _record('z.gms', SolverTime=4.0, ModelStatus=13)],
+    })
+    assert analysis.solved().tolist() == [[True, False, False]]
+    assert analysis.times().tolist() == [[1.5, 100, 100]]
+    assert analysis.times('ETInterface').tolist() == [[2.0, 100, 100]]
+
+
+def test_wrong_tolerance(tmp_path):
+    solu = '=opt=  x  10\n=opt=  y  10\n=opt=  z  10\n=best=  w  10\n=bestdual=  w  5\n'
+    analysis = _analysis(tmp_path, {
+        'a': [
+            # primal bound within tolerance of the optimal value
+            _record('x.gms', ObjectiveValue=10 - 0.5e-5, ObjectiveValueEstimate=10),
+            # primal bound better than the optimal value
+            _record('y.gms', ObjectiveValue=10 - 2e-5, ObjectiveValueEstimate=10),
+            # dual bound worse than the optimal value
+            _record('z.gms', ObjectiveValue=10, ObjectiveValueEstimate=10 + 2e-5),
+            # between the best known bounds
+            _record('w.gms', ModelStatus=8, ObjectiveValue=7, ObjectiveValueEstimate=6),
+        ],
+        'b': [
+            # maximization: primal bound above the optimal value
+            _record('x.gms', Direction=1, ObjectiveValue=10 + 2e-5,
+                    ObjectiveValueEstimate=10 + 2e-5),
+            # maximization: within tolerance
+            _record('y.gms', Direction=1, ObjectiveValue=10 + 0.5e-5,
+                    ObjectiveValueEstimate=10),
+            # not normal completion, bounds are not checked
+            _record('z.gms', SolverStatus=3, ObjectiveValue=1, ObjectiveValueEstimate=20),
+            # below the best known dual bound
+            _record('w.gms', ModelStatus=8, ObjectiveValue=4, ObjectiveValueEstimate=4),
+        ],
+    }, solu)
+    assert analysis.instances == ['w', 'x', 'y', 'z']
+    assert analysis.wrong().tolist() == [[False, False, True, True],
+                                         [True, True, False, False]]
+    assert analysis.solved().tolist() == [[True, True, False, False],
+                                          [False, False, True, False]]
+    assert analysis.statuses()[0, 2] == STATUS_WRONG
+
+
+def test_wrong_status(tmp_path):
+    solu = '=inf=  x\n=opt=  y  1\n'
+    analysis = _analysis(tmp_path, {
+        'a': [_record('x.gms', ObjectiveValue=1),
+              _record('y.gms', ModelStatus=4)],
+        'b': [_record('x.gms', ModelStatus=4),
+              _record('y.gms', ModelStatus=2, ObjectiveValue=1)],
+    }, solu)
+    assert analysis.wrong().tolist() == [[True, True], [False, False]]
+    assert analysis.solved().tolist() == [[False, False], [True, True]]
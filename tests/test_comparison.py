@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+""" Tests of Comparison """
+# pylint: disable=protected-access
+
+import importlib.util
+import os
+
+from conftest import trace_record
+from comparison import Comparison
+from trace_dict import TraceDict
+
+
+def _main_module():
+    # __main__.py of the benchmark (not run, its entry point is guarded)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'benchmark',
+                        '__main__.py')
+    spec = importlib.util.spec_from_file_location('benchmark_main', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _result(path, instances, configuration='conf'):
+    # result directory with the trace file of a configuration, instances as dict of
+    # instance name to trace entries
+    traces = TraceDict()
+    for name, entries in instances.items():
+        traces.append(trace_record(name + '.gms', **dict(
+            dict(Direction=0, ModelStatus=1, SolverStatus=1, SolverTime=10.0), **entries)))
+    os.makedirs(os.path.join(str(path), configuration))
+    traces.write(os.path.join(str(path), configuration, 'trace.trc'))
+    return str(path)
+
+
+def _comparison(tmp_path, baseline, new):
+    # compares runs given as lists of instances (see _result)
+    comparison = Comparison(max_time=60, threshold=0.2, min_time=1.0)
+    comparison.load([_result(tmp_path / ('baseline%d' % i), instances)
+                     for i, instances in enumerate(baseline)],
+                    [_result(tmp_path / ('new%d' % i), instances)
+                     for i, instances in enumerate(new)])
+    return comparison
+
+
+def _changed(comparison, changes):
+    return sorted(comparison.keys[j][1] for j, changed in enumerate(changes) if changed)
+
+
+def test_status_severity(tmp_path):
+    comparison = _comparison(tmp_path, [{
+        'limit': dict(),
+        'fail': dict(SolverStatus=3),
+        'switch': dict(),
+        'better': dict(SolverStatus=3),
+        'feasible': dict(ModelStatus=8),
+        'same': dict(ModelStatus=4),
+    }], [{
+        'limit': dict(SolverStatus=3),
+        'fail': dict(ModelStatus=13),
+        'switch': dict(ModelStatus=4),
+        'better': dict(),
+        'feasible': dict(),
+        'same': dict(ModelStatus=4),
+    }])
+    worse, better = comparison._status_changes()
+    # optimal -> limit, limit -> fail and optimal -> infeasible (same severity)
+    assert _changed(comparison, worse) == ['fail', 'limit', 'switch']
+    assert _changed(comparison, better) == ['better', 'feasible']
+
+    report, regressions = comparison.report()
+    assert regressions
+    assert '3 regressions (3 status, 0 objective, 0 slowdown)' in report
+    # ranked by the severity difference
+    lines = report.splitlines()
+    assert lines[1].split()[:3] == ['status', 'conf', 'limit']
+
+
+def test_repeat_overlap(tmp_path):
+    baseline = [10.0, 12.0, 14.0]
+    overlap = [13.0, 16.0, 20.0]
+    separate = [15.0, 16.0, 20.0]
+    comparison = _comparison(
+        tmp_path,
+        [dict(overlap=dict(SolverTime=time), separate=dict(SolverTime=time))
+         for time in baseline],
+        [dict(overlap=dict(SolverTime=time_overlap), separate=dict(SolverTime=time_separate))
+         for time_overlap, time_separate in zip(overlap, separate)])
+    assert comparison.baseline['runs'].tolist() == [3, 3]
+    assert comparison.baseline['time'].tolist() == [12.0, 12.0]
+    assert comparison.new['time'].tolist() == [16.0, 16.0]
+    slower, faster = comparison._time_changes()
+    # median slower by more than the thresholds, time ranges overlap for one instance
+    assert _changed(comparison, slower) == ['separate']
+    assert not faster.any()
+
+
+def test_single_run_thresholds(tmp_path):
+    comparison = _comparison(tmp_path, [{
+        'slower': dict(SolverTime=12.0),
+        'relative': dict(SolverTime=12.0),
+        'absolute': dict(SolverTime=0.2),
+        'faster': dict(SolverTime=20.0),
+    }], [{
+        'slower': dict(SolverTime=16.0),
+        'relative': dict(SolverTime=14.0),
+        'absolute': dict(SolverTime=1.0),
+        'faster': dict(SolverTime=10.0),
+    }])
+    slower, faster = comparison._time_changes()
+    assert _changed(comparison, slower) == ['slower']
+    assert _changed(comparison, faster) == ['faster']
+
+
+def test_objective_tolerance(tmp_path):
+    comparison = _comparison(tmp_path, [{
+        'large': dict(ObjectiveValue=1e6),
+        'large_drift': dict(ObjectiveValue=1e6),
+        'small': dict(ObjectiveValue=0.5),
+        'small_drift': dict(ObjectiveValue=0.5),
+        'max_worse': dict(Direction=1, ObjectiveValue=100.0),
+        'max_better': dict(Direction=1, ObjectiveValue=100.0),
+    }], [{
+        # relative tolerance for objective values larger than 1
+        'large': dict(ObjectiveValue=1e6 + 5),
+        'large_drift': dict(ObjectiveValue=1e6 + 20),
+        # absolute tolerance otherwise
+        'small': dict(ObjectiveValue=0.5 + 0.5e-5),
+        'small_drift': dict(ObjectiveValue=0.5 + 2e-5),
+        'max_worse': dict(Direction=1, ObjectiveValue=99.0),
+        'max_better': dict(Direction=1, ObjectiveValue=101.0),
+    }])
+    worse, better, _ = comparison._objective_changes()
+    assert _changed(comparison, worse) == ['large_drift', 'max_worse', 'small_drift']
+    assert _changed(comparison, better) == ['max_better']
+
+
+def test_exit_code(tmp_path):
+    main = _main_module()
+    baseline = _result(tmp_path / 'baseline', dict(a=dict(), b=dict(SolverTime=20.0)))
+    improved = _result(tmp_path / 'improved', dict(a=dict(), b=dict(SolverTime=10.0)))
+    regressed = _result(tmp_path / 'regressed', dict(a=dict(SolverStatus=3), b=dict()))
+    solu = str(tmp_path / 'missing.solu')
+
+    # improvements only
+    assert main._compare(['--baseline', baseline, '--new', improved, '--solu', solu]) == 0
+    assert main._compare(['--baseline', baseline, '--new', regressed, '--solu', solu]) == 1
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+""" Tests of CpuTopology """
+# pylint: disable=protected-access
+
+import os
+
+from cpu_topology import CpuTopology
+
+
+def _sysfs(tmp_path, siblings, nodes):
+    # cpu devices with the given thread siblings lists and NUMA nodes by cpu
+    for cpu, cpulist in siblings.items():
+        path = tmp_path / ('cpu%d' % cpu)
+        (path / 'topology').mkdir(parents=True)
+        if cpulist is not None:
+            (path / 'topology' / 'thread_siblings_list').write_text(cpulist + '\n')
+        (path / ('node%d' % nodes[cpu])).mkdir()
+    return str(tmp_path)
+
+
+def _topology(tmp_path, monkeypatch, allowed, mode='core'):
+    # two NUMA nodes with two physical cores of two hardware threads each
+    sysfs = _sysfs(tmp_path, {0: '0,2', 1: '1,3', 2: '0,2', 3: '1,3', 4: '4-5', 5: '4-5',
+                              6: '6-7', 7: '6-7'},
+                   {0: 0, 1: 0, 2: 0, 3: 0, 4: 1, 5: 1, 6: 1, 7: 1})
+    monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: set(allowed))
+    return CpuTopology(mode, sysfs)
+
+
+def test_parse_cpulist():
+    assert CpuTopology._parse_cpulist('0-2,5,8-9\n') == [0, 1, 2, 5, 8, 9]
+    assert CpuTopology._parse_cpulist('3') == [3]
+    assert CpuTopology._parse_cpulist('\n') == []
+
+
+def test_cores(tmp_path, monkeypatch):
+    topology = _topology(tmp_path, monkeypatch, range(8))
+    # NUMA nodes alternate
+    assert topology.cores == [(0, 2), (4, 5), (1, 3), (6, 7)]
+    assert topology.n_cores() == 4
+
+
+def test_allowed(tmp_path, monkeypatch):
+    # siblings not allowed to the benchmark are not used
+    topology = _topology(tmp_path, monkeypatch, [0, 1, 2, 4])
+    assert topology.cores == [(0, 2), (4,), (1,)]
+
+
+def test_missing_topology(tmp_path, monkeypatch):
+    # cpus without thread siblings list are a core of their own
+    sysfs = _sysfs(tmp_path, {0: None, 1: None}, {0: 0, 1: 0})
+    monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: {0, 1})
+    assert CpuTopology('core', sysfs).cores == [(0,), (1,)]
+
+
+def test_allocate_release(tmp_path, monkeypatch):
+    topology = _topology(tmp_path, monkeypatch, range(8))
+    first = topology.allocate(2)
+    assert first == [0, 2, 4, 5]
+    assert topology.allocate(3) is None
+    second = topology.allocate(1)
+    assert second == [1, 3]
+    topology.release(first)
+    # released cores are handed out again in the order of the cores
+    assert topology.free == [(0, 2), (4, 5), (6, 7)]
+
+    # one hardware thread per core, the siblings stay idle
+    topology = _topology(tmp_path / 'cpu', monkeypatch, range(8), mode='cpu')
+    assert topology.allocate(3) == [0, 1, 4]
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+""" Tests of Job (model file links) """
+# pylint: disable=protected-access
+
+import os
+import stat
+import fcntl
+import warnings
+
+import pytest
+
+from job import Job
+
+
+def _fail(*args):
+    raise OSError("not supported: %s" % (args,))
+
+
+def _model(tmp_path, writable=False):
+    source = tmp_path / 'model.gms'
+    source.write_text('* model\n')
+    if not writable:
+        source.chmod(0o444)
+    return str(source), str(tmp_path / 'link.gms')
+
+
+def _mode(path):
+    return stat.S_IMODE(os.lstat(path).st_mode)
+
+
+def test_reflink(tmp_path, monkeypatch):
+    source, target = _model(tmp_path, writable=True)
+    monkeypatch.setattr(fcntl, 'ioctl', lambda *args: 0)
+    assert Job._link(source, target) == 'reflink'
+    assert _mode(target) == 0o444
+    assert _mode(source) == 0o644
+
+
+def test_fallback_order(tmp_path, monkeypatch):
+    # reflinks are not supported on the file system of the test
+    monkeypatch.setattr(fcntl, 'ioctl', _fail)
+    source, target = _model(tmp_path)
+    assert Job._link(source, target) == 'hardlink'
+    assert os.path.samefile(source, target)
+
+    os.remove(target)
+    monkeypatch.setattr(os, 'link', _fail)
+    assert Job._link(source, target) == 'symlink'
+    assert os.readlink(target) == source
+
+    os.remove(target)
+    monkeypatch.setattr(os, 'symlink', _fail)
+    assert Job._link(source, target) == 'copy'
+    assert not os.path.islink(target) and _mode(target) == 0o444
+
+
+def test_writable_testset(tmp_path, monkeypatch):
+    monkeypatch.setattr(fcntl, 'ioctl', _fail)
+    source, target = _model(tmp_path, writable=True)
+    # copied (with a warning), the testset file is not made read-only
+    with pytest.warns(UserWarning, match='writable'):
+        assert Job._link(source, target) == 'copy'
+    assert _mode(target) == 0o444
+    assert _mode(source) == 0o644
+
+    # warned once per directory
+    os.remove(target)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert Job._link(source, target) == 'copy'
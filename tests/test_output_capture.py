@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+""" Tests of OutputCapture """
+
+import itertools
+
+import pytest
+
+from output_capture import OutputCapture, TAIL_SIZE
+
+
+def _capture(path, chunks, limit=None):
+    capture = OutputCapture(str(path), limit)
+    capture.open()
+    for chunk in chunks:
+        capture.write(chunk)
+    capture.close()
+    return path.read_bytes()
+
+
+def test_unlimited(tmp_path):
+    assert _capture(tmp_path / 'out.txt', [b'abc', b'def']) == b'abcdef'
+
+
+@pytest.mark.parametrize('sizes', [[26], [1] * 26, [3, 11, 5, 7], [20, 6]])
+def test_head_tail(tmp_path, sizes):
+    # output of the job written in chunks of the given sizes
+    output = b'abcdefghijklmnopqrstuvwxyz'
+    chunks = [output[end - size:end] for size, end in zip(sizes, itertools.accumulate(sizes))]
+    assert _capture(tmp_path / 'out.txt', chunks, limit=9) == \
+        b'abcd\n[... 17 bytes omitted ...]\nvwxyz'
+
+
+def test_within_limit(tmp_path):
+    # ring region not filled or filled exactly: nothing omitted
+    assert _capture(tmp_path / 'a.txt', [b'abcdef'], limit=9) == b'abcdef'
+    assert _capture(tmp_path / 'b.txt', [b'abcde', b'fghi'], limit=9) == b'abcdefghi'
+
+
+def test_text(tmp_path):
+    capture = OutputCapture(str(tmp_path / 'out.txt'), 10)
+    capture.open()
+    capture.write(b'x' * TAIL_SIZE)
+    capture.write(b'end \xff')
+    capture.close()
+    # last bytes kept in memory, decoded leniently
+    assert capture.text() == 'x' * (TAIL_SIZE - 5) + 'end \ufffd'
+    assert capture.size == TAIL_SIZE + 5
+
+
+def test_load(tmp_path):
+    path = tmp_path / 'out.txt'
+    path.write_bytes(b'abcdefghijklmnopqrstuvwxyz')
+    assert OutputCapture.load(str(path), limit=9) == 'abcdefghijklmnopqrstuvwxyz'
+    assert path.read_bytes() == b'abcd\n[... 17 bytes omitted ...]\nvwxyz'
+    assert OutputCapture.load(str(tmp_path / 'missing.txt')) == ''
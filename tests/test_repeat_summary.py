@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+""" Tests of RepeatSummary """
+
+from conftest import trace_record
+from repeat_summary import RepeatSummary
+
+
+def _summary(times, et_times=None):
+    # summary of repeats with the given solver times (by repeat index)
+    et_times = et_times or dict()
+    return RepeatSummary('a.gms', {repeat: trace_record('a.gms', SolverTime=time,
+                                                        ETInterface=et_times.get(repeat))
+                                   for repeat, time in times.items()})
+
+
+def test_outliers():
+    summary = _summary({0: 10.0, 1: 12.0, 2: 11.0, 3: 13.0, 4: 100.0}, {0: 2.0, 1: 1.0})
+    assert summary.representative() == 1
+    assert summary.trace() is summary.traces[1]
+    record = summary.record
+    assert record['Repeats'] == 5
+    assert (record['SolverTimeMedian'], record['SolverTimeMin'], record['SolverTimeMax']) == (
+        12.0, 10.0, 100.0)
+    assert (record['SolverTimeQ1'], record['SolverTimeQ3'], record['SolverTimeIQR']) == (
+        11.0, 13.0, 2.0)
+    assert record['ETInterfaceMedian'] == 1.5
+    # outside of [11 - 1.5 * 2, 13 + 1.5 * 2]
+    assert record['Outliers'] == '4'
+    assert summary.line() == 'a.gms,5,1,12.0,10.0,100.0,11.0,13.0,2.0,1.5,4\n'
+
+
+def test_representative():
+    # lower median of an even number of repeats, repeats without solver time are the
+    # slowest
+    summary = _summary({0: 5.0, 1: 3.0, 2: None, 3: 4.0})
+    assert summary.representative() == 3
+    assert summary.record['Repeats'] == 4
+    assert summary.record['SolverTimeMedian'] == 4.0
+    assert summary.record['Outliers'] == ''
+
+    # equal times: ordered by repeat index
+    assert _summary({0: 1.0, 1: 1.0, 2: 1.0}).representative() == 1
+    assert _summary({2: 1.0, 1: 1.0}).representative() == 1
+
+
+def test_single_repeat():
+    summary = _summary({0: None})
+    assert summary.representative() == 0
+    assert summary.record['SolverTimeMedian'] is None
+    summary = _summary({0: 2.0})
+    assert summary.record['SolverTimeMedian'] == 2.0
+    assert summary.record['SolverTimeIQR'] is None
+    assert summary.line() == 'a.gms,1,0,2.0,2.0,2.0,NA,NA,NA,NA,\n'
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+""" Tests of ResultCache """
+# pylint: disable=protected-access
+
+import os
+import time
+
+from conftest import trace_record
+from job import Job
+from result_cache import ResultCache
+from runner import Runner
+
+
+def _job(tmp_path, configuration=(('solver', 'scip'),), max_time=60, models='models',
+         model='* model\n', name='a'):
+    # job of a (read-only) model file with the given content
+    model_file = tmp_path / models / ('%s.gms' % name)
+    model_file.parent.mkdir(exist_ok=True)
+    if model_file.exists():
+        model_file.unlink()
+    model_file.write_text(model)
+    model_file.chmod(0o444)
+    job = Job(name, str(tmp_path / 'work' / name), str(model_file), list(configuration),
+              max_time, max_time)
+    job.create_workdir()
+    return job
+
+
+def _cache(tmp_path, **kwargs):
+    cache = ResultCache(str(tmp_path / 'cache'), **kwargs)
+    cache.open()
+    return cache
+
+
+def test_key(tmp_path):
+    runner = Runner()
+    cache = _cache(tmp_path)
+    key = cache.key(_job(tmp_path), runner)
+    assert cache.key(_job(tmp_path), runner) == key
+
+    # sensitive to each input (the model file content is hashed once per path)
+    assert cache.key(_job(tmp_path, models='changed', model='* changed\n'), runner) != key
+    assert cache.key(_job(tmp_path, name='b'), runner) != key
+    assert cache.key(_job(tmp_path, configuration=[('solver', 'baron')]), runner) != key
+    assert cache.key(_job(tmp_path, max_time=30), runner) != key
+    job = _job(tmp_path)
+    job.repeat = 1
+    assert cache.key(job, runner) != key
+    runner.version_gams = '45.1.0'
+    assert cache.key(_job(tmp_path), runner) != key
+    cache.close()
+
+
+def test_add_get(tmp_path):
+    cache = _cache(tmp_path)
+    job = _job(tmp_path)
+    (tmp_path / 'work' / 'a' / 'a.lst').write_text('listing\n')
+    cache.add('k', trace_record('a.gms', SolverTime=1.5), job.workdir, exclude=['a.gms'])
+    cache.commit()
+    assert sorted(os.listdir(cache._entry_path('k'))) == ['a.lst']
+
+    # files restored into the working directory of a new run
+    workdir = tmp_path / 'restored'
+    workdir.mkdir()
+    trace = cache.get('k', str(workdir))
+    assert trace.record['SolverTime'] == 1.5
+    assert sorted(os.listdir(str(workdir))) == ['a.lst', 'trace.trc']
+    assert cache.hits == 1
+    assert cache.get('missing', str(workdir)) is None
+    cache.close()
+
+    cache = _cache(tmp_path, bypass=True)
+    assert cache.get('k', str(workdir)) is None
+    cache.close()
+
+
+def test_evict(tmp_path):
+    cache = _cache(tmp_path)
+    job = _job(tmp_path)
+    for key in ('old', 'used', 'new'):
+        cache.add(key, trace_record('a.gms'), job.workdir)
+        time.sleep(0.01)
+    cache.get('used', str(tmp_path / 'work' / 'a'))
+    cache.commit()
+    size = cache.connection.execute("SELECT size FROM entries WHERE key = 'new'").fetchone()[0]
+    cache.close()
+
+    # least recently used entries evicted until the rest fits
+    cache = _cache(tmp_path, max_size=2 * size)
+    keys = [key for key, in cache.connection.execute("SELECT key FROM entries")]
+    assert sorted(keys) == ['new', 'used']
+    assert not os.path.exists(cache._entry_path('old'))
+    cache.close()
+
+    # entries not used within max_age
+    time.sleep(0.05)
+    cache = _cache(tmp_path, max_age=0.01)
+    assert cache.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 0
+    cache.close()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+""" Tests of Scheduler (resume of an interrupted benchmark) """
+
+import os
+import sys
+import sqlite3
+
+from output import Output
+from runner import Runner
+from scheduler import Scheduler
+
+
+class _Runner(Runner):
+    # runs every job as a python process that does nothing, records the started jobs
+
+    def __init__(self):
+        super().__init__()
+        self.modelfile_ext = 'gms'
+        self.started = list()
+
+
+    def command(self, job):
+        self.started.append(job.filename())
+        return [sys.executable, '-c', 'pass']
+
+
+def _models(tmp_path):
+    path = tmp_path / 'models'
+    if path.exists():
+        return str(path)
+    path.mkdir()
+    for name in ('a', 'b', 'c'):
+        (path / ('%s.gms' % name)).write_text('* %s\n' % name)
+        (path / ('%s.gms' % name)).chmod(0o444)
+    return str(path)
+
+
+def _run(tmp_path, packs=False, scratch=False, prefetch=0):
+    # runs the models with one configuration, returns the started jobs
+    runner = _Runner()
+    scheduler = Scheduler(runner, str(tmp_path / 'result'), [[('solver', 'conf')]],
+                          Output('name'))
+    if packs:
+        scheduler.use_packs()
+    if scratch:
+        scheduler.use_scratch(str(tmp_path / 'scratch'))
+    if prefetch > 0:
+        scheduler.use_prefetch(prefetch)
+    scheduler.create(_models(tmp_path))
+    scheduler.run(2)
+    return sorted(runner.started)
+
+
+def _manifest(tmp_path, delete=None):
+    # job keys recorded in the manifest, after deleting the row of a job
+    connection = sqlite3.connect(str(tmp_path / 'result' / 'manifest.db'))
+    if delete is not None:
+        connection.execute("DELETE FROM jobs WHERE filename = ?", (delete,))
+        connection.commit()
+    keys = sorted(row[0] for row in connection.execute("SELECT filename FROM jobs"))
+    connection.close()
+    return keys
+
+
+def _trace_names(tmp_path):
+    with open(str(tmp_path / 'result' / 'conf' / 'trace.trc')) as fio:
+        return sorted(line.split(',')[0] for line in fio if not line.startswith('*'))
+
+
+def test_resume_finished(tmp_path):
+    assert _run(tmp_path) == ['a.gms', 'b.gms', 'c.gms']
+    assert _manifest(tmp_path) == ['a.gms', 'b.gms', 'c.gms']
+
+    # finished job (trace file stored) that was not recorded in the manifest: recorded,
+    # not run again. Unfinished job: run again in a cleaned working directory.
+    _manifest(tmp_path, delete='a.gms')
+    workdir = tmp_path / 'result' / 'conf' / 'b'
+    _manifest(tmp_path, delete='b.gms')
+    os.remove(str(workdir / 'trace.trc'))
+    (workdir / 'stale.txt').write_text('')
+    assert _run(tmp_path) == ['b.gms']
+    assert _manifest(tmp_path) == ['a.gms', 'b.gms', 'c.gms']
+    assert not (workdir / 'stale.txt').exists()
+    assert (workdir / 'trace.trc').exists()
+    assert _trace_names(tmp_path) == ['a.gms', 'b.gms', 'c.gms']
+
+
+def test_resume_pack(tmp_path):
+    assert _run(tmp_path, packs=True) == ['a.gms', 'b.gms', 'c.gms']
+    assert not (tmp_path / 'result' / 'conf' / 'a').exists()
+
+    # killed after the files were packed, before the manifest was committed
+    _manifest(tmp_path, delete='a.gms')
+    assert _run(tmp_path, packs=True) == []
+    assert _manifest(tmp_path) == ['a.gms', 'b.gms', 'c.gms']
+    assert _trace_names(tmp_path) == ['a.gms', 'b.gms', 'c.gms']
+
+    # job not stored in the pack, run again in a prefetched working directory
+    connection = sqlite3.connect(str(tmp_path / 'result' / 'conf' / 'pack.db'))
+    connection.execute("DELETE FROM files WHERE name LIKE 'b/%'")
+    connection.commit()
+    connection.close()
+    _manifest(tmp_path, delete='b.gms')
+    assert _run(tmp_path, packs=True, prefetch=2) == ['b.gms']
+    assert _manifest(tmp_path) == ['a.gms', 'b.gms', 'c.gms']
+    assert not (tmp_path / 'result' / 'conf' / 'b').exists()
+
+def test_resume_scratch(tmp_path):
+    assert _run(tmp_path, scratch=True) == ['a.gms', 'b.gms', 'c.gms']
+    assert (tmp_path / 'result' / 'conf' / 'a' / 'trace.trc').exists()
+    assert os.listdir(str(tmp_path / 'scratch')) == []
+
+    # killed after the files were copied back, before the manifest was committed
+    _manifest(tmp_path, delete='a.gms')
+    assert _run(tmp_path, scratch=True) == []
+    assert _manifest(tmp_path) == ['a.gms', 'b.gms', 'c.gms']
+
+    # scratch and pack
+    _manifest(tmp_path, delete='b.gms')
+    os.remove(str(tmp_path / 'result' / 'conf' / 'c' / 'trace.trc'))
+    _manifest(tmp_path, delete='c.gms')
+    assert _run(tmp_path, packs=True, scratch=True) == ['c.gms']
+    assert _manifest(tmp_path) == ['a.gms', 'b.gms', 'c.gms']
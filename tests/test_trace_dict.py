@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+""" Tests of TraceDict """
+
+import pytest
+
+from conftest import trace_record
+from trace_dict import TraceDict
+from trace_reader import read_rows
+
+
+def test_append_get():
+    traces = TraceDict()
+    traces.append(trace_record('a.gms', ModelType='MINLP', ModelStatus=1, SolverStatus=1,
+                               ObjectiveValue=3.5, SolverTime=1.25, Affinity='0 1'))
+    traces.append(trace_record('b.gms', ObjectiveValue=None))
+    assert len(traces) == 2
+    assert 'a.gms' in traces and 'c.gms' not in traces
+    assert traces.get('c.gms') is None
+
+    record = traces.get('a.gms').record
+    assert record['ModelType'] == 'MINLP'
+    assert record['ModelStatus'] == 1 and isinstance(record['ModelStatus'], int)
+    assert record['ObjectiveValue'] == 3.5
+    assert record['SolverTime'] == 1.25
+    assert record['Affinity'] == '0 1'
+    assert record['PeakRSS'] is None
+
+    # defaults of a trace record, NA
+    record = traces.get('b.gms').record
+    assert record['SolverStatus'] == 13
+    assert record['ModelStatus'] == 12
+    assert record['ObjectiveValue'] is None
+    assert record['ModelType'] is None
+
+
+def test_na():
+    traces = TraceDict()
+    traces.append(trace_record('a.gms', ObjectiveValue=float('nan'), ModelType=None))
+    record = traces.get('a.gms').record
+    assert record['ObjectiveValue'] is None
+    assert record['ModelType'] is None
+
+
+def test_replace():
+    traces = TraceDict()
+    traces.append(trace_record('a.gms', ObjectiveValue=1.0, ModelType='NLP'))
+    traces.append(trace_record('a.gms', ObjectiveValue=None, ModelType='MINLP'))
+    assert len(traces) == 1
+    record = traces.get('a.gms').record
+    assert record['ObjectiveValue'] is None
+    assert record['ModelType'] == 'MINLP'
+
+
+def test_write_roundtrip(tmp_path):
+    traces = TraceDict()
+    traces.append(trace_record('b.gms', ModelType='MINLP', Direction=1, ModelStatus=2,
+                               SolverStatus=1, ObjectiveValue=-1e-7, SolverTime=0.5,
+                               NumberOfNodes=None, PeakRSS=12.5, ModelLink='hardlink'))
+    traces.append(trace_record('a.gms', ObjectiveValue=None, KillSignal=15))
+    trcfile = str(tmp_path / 'trace.trc')
+    traces.write(trcfile)
+
+    # sorted by input file name
+    rows = read_rows(trcfile)
+    assert [row['InputFileName'] for row in rows] == ['a.gms', 'b.gms']
+
+    loaded = TraceDict()
+    loaded.append_trc(trcfile)
+    for name in ('a.gms', 'b.gms'):
+        assert loaded.get(name).record == traces.get(name).record
+
+    # empty databases do not write a file
+    TraceDict().write(str(tmp_path / 'empty.trc'))
+    assert not (tmp_path / 'empty.trc').exists()
+
+
+def test_load_solu(tmp_path):
+    solufile = tmp_path / 'test.solu'
+    solufile.write_text('=opt=  a  1.5\n=inf=  b\n=best=  c  2\n=bestdual=  c  1\n'
+                        '=bestdual=  d  -3\n')
+    traces = TraceDict()
+    traces.load_solu(str(solufile))
+    assert traces.get('a').record['ModelStatus'] == 1
+    assert traces.get('a').record['ObjectiveValue'] == 1.5
+    assert traces.get('a').record['ObjectiveValueEstimate'] == 1.5
+    assert traces.get('b').record['ModelStatus'] == 4
+    assert traces.get('c').record['ModelStatus'] == 2
+    assert traces.get('c').record['ObjectiveValue'] == 2
+    assert traces.get('c').record['ObjectiveValueEstimate'] == 1
+    assert traces.get('d').record['ObjectiveValue'] is None
+    assert traces.get('d').record['ObjectiveValueEstimate'] == -3
+
+
+def test_column():
+    traces = TraceDict()
+    traces.append(trace_record('a.gms', ObjectiveValue=2.0, ModelStatus=1))
+    traces.append(trace_record('b.gms', ObjectiveValue=None, ModelStatus=4))
+    assert traces.names() == ['a.gms', 'b.gms']
+    values, missing = traces.column('ObjectiveValue')
+    assert values[0] == 2.0 and list(missing) == [0, 1]
+    values, missing = traces.column('ModelStatus')
+    assert list(values) == [1, 4] and list(missing) == [0, 0]
+    with pytest.raises(ValueError):
+        traces.column('ModelType')
+
+
+def test_append_trc_columns(tmp_path):
+    traces = TraceDict()
+    traces.append(trace_record('a.gms', ModelType='NLP', ObjectiveValue=1.5, SolverTime=2.0))
+    traces.append(trace_record('b.gms', ModelType=None, ObjectiveValue=None, SolverTime=3.0))
+    trcfile = tmp_path / 'trace.trc'
+    traces.write(str(trcfile))
+    content = trcfile.read_text()
+
+    # read column-wise as the records read row-wise
+    loaded = TraceDict()
+    loaded.append_trc(str(trcfile))
+    for row in read_rows(str(trcfile)):
+        assert loaded.get(row['InputFileName']).record == row
+
+    # entries not loaded are NA
+    loaded = TraceDict()
+    loaded.append_trc(str(trcfile), ['SolverTime'])
+    assert loaded.get('a.gms').record['SolverTime'] == 2.0
+    assert loaded.get('a.gms').record['ObjectiveValue'] is None
+    assert loaded.get('a.gms').record['ModelType'] is None
+
+    # truncated line and repeated record (replacing the first one)
+    lines = content.splitlines()
+    trcfile.write_text(content + lines[-1].replace(',3.0,', ',4.0,') + '\nc.gms,NLP\n')
+    loaded = TraceDict()
+    loaded.append_trc(str(trcfile))
+    assert loaded.names() == ['a.gms', 'b.gms', 'c.gms']
+    assert loaded.get('b.gms').record['SolverTime'] == 4.0
+    assert loaded.get('c.gms').record['ModelType'] == 'NLP'
+    assert loaded.get('c.gms').record['SolverTime'] is None
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+""" Tests of TraceWriter """
+
+from conftest import trace_record
+from manifest import Manifest
+from trace_reader import read_rows
+from trace_writer import TraceWriter
+
+
+def _writer(path, records):
+    writer = TraceWriter(str(path))
+    writer.open()
+    for trace in records:
+        writer.append(trace)
+    writer.close()
+    return writer
+
+
+def test_append_close(tmp_path):
+    trcfile = tmp_path / 'conf' / 'trace.trc'
+    writer = TraceWriter(str(trcfile))
+    writer.open()
+    writer.append(trace_record('b.gms', SolverTime=2.0))
+    writer.append(trace_record('a.gms', SolverTime=1.0))
+    writer.flush()
+    # appended in the order of completion
+    assert [row['InputFileName'] for row in read_rows(str(trcfile))] == ['b.gms', 'a.gms']
+
+    writer.append(trace_record('a.gms', SolverTime=3.0))
+    writer.close()
+    rows = read_rows(str(trcfile))
+    assert [(row['InputFileName'], row['SolverTime']) for row in rows] == [
+        ('a.gms', 3.0), ('b.gms', 2.0)]
+
+
+def test_truncated_line(tmp_path):
+    trcfile = tmp_path / 'trace.trc'
+    _writer(trcfile, [trace_record('a.gms', SolverTime=1.0),
+                      trace_record('b.gms', SolverTime=2.0)])
+    content = trcfile.read_text()
+    # a write interrupted within the last line
+    trcfile.write_text(content + content.splitlines()[-1][:-5])
+
+    writer = TraceWriter(str(trcfile))
+    writer.open()
+    assert sorted(writer.lines) == ['a.gms', 'b.gms']
+    assert trcfile.read_text() == content
+
+    # a duplicate record of an append after a crash during the rewrite
+    trcfile.write_text(content + content.splitlines()[-1] + '\n')
+    writer.open()
+    assert trcfile.read_text() == content
+
+
+def test_header_change(tmp_path):
+    trcfile = tmp_path / 'trace.trc'
+    _writer(trcfile, [trace_record('a.gms', SolverTime=1.0),
+                      trace_record('b.gms', SolverTime=2.0)])
+    # file of a former trace record definition (without the last entry)
+    lines = trcfile.read_text().splitlines()
+    old = ''.join(line.rsplit(',', 1)[0] + '\n' for line in lines)
+    trcfile.write_text(old)
+
+    # rebuilt from the records of the finished jobs in the manifest
+    manifest = Manifest(str(tmp_path / 'manifest.db'))
+    manifest.open()
+    manifest.add('conf', trace_record('a.gms', SolverTime=1.0))
+    manifest.add('conf', trace_record('b.gms', SolverTime=2.0, PeakRSS=10.0))
+    writer = TraceWriter(str(trcfile))
+    writer.open(manifest.records()['conf'].values())
+    manifest.close()
+    assert sorted(writer.lines) == ['a.gms', 'b.gms']
+    assert trcfile.read_text().startswith(writer.header)
+    rows = read_rows(str(trcfile))
+    assert [(row['InputFileName'], row['SolverTime'], row['PeakRSS']) for row in rows] == [
+        ('a.gms', 1.0, None), ('b.gms', 2.0, 10.0)]
+
+    # without records the file is discarded
+    trcfile.write_text(old)
+    writer.open()
+    assert len(writer.lines) == 0
+    assert not trcfile.exists()